@@ -0,0 +1,122 @@
+"""
+Micro-benchmark: scoring every candidate placement on mid-game boards.
+
+Compares the full-recompute scalar path, the incremental evaluator used by
+`Bot.decide`, and the NumPy batch path (`Bot(vectorized=True)`).
+
+    python benchmarks/bench_batch_scoring.py --boards 200
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from player import batch, bitboard, pieces
+from player.evaluator import IncrementalEvaluator
+from tetris.engine import TetrisEngine
+
+WEIGHTS = [-0.50071, -1.88081, -0.166608, -0.440309, -0.222253, -0.303606, -0.0279, -0.0257]
+LINES_BONUS = 0.760666
+
+
+def candidates(board, W, piece):
+    tops = bitboard.surface(board, W)
+    out = []
+    for rot in pieces.table(W)[piece]:
+        for x in range(rot.xmin, rot.xmax + 1):
+            y = bitboard.landing_y(board, W, tops, rot, x)
+            if y is not None:
+                out.append((rot, x, y))
+    return out
+
+
+def midgame_positions(n: int, seed: int):
+    """Greedy play with random blunders, sampled while the stack is mid-height."""
+    rng = random.Random(seed)
+    out = []
+    game_seed = seed
+    while len(out) < n:
+        env = TetrisEngine(seed=game_seed)
+        game_seed += 1
+        W = env.cols
+        while not env.done and len(out) < n:
+            board = bitboard.from_grid(env.game.grid)
+            piece = env.game.fig.type
+            cands = candidates(board, W, piece)
+            if not cands:
+                break
+            if 6 <= bitboard.features(board, W)[3] <= 14:
+                out.append((board, piece))
+            if rng.random() < 0.25:
+                rot, x, _ = rng.choice(cands)
+            else:
+                ev = IncrementalEvaluator(board, W)
+                rot, x, _ = max(cands, key=lambda c: _score(*ev.evaluate(*c)))
+            env.step_place(pieces.table(W)[piece].index(rot), x)
+    return out
+
+
+def _score(cleared, f):
+    return sum(w * v for w, v in zip(WEIGHTS, f)) + LINES_BONUS * cleared
+
+
+def bench(fn, positions, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for board, piece, cands in positions:
+            fn(board, cands)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(positions)
+
+
+def full_recompute(board, cands, W=15):
+    return [_score(*_full(board, W, c)) for c in cands]
+
+
+def _full(board, W, c):
+    cleared, after = bitboard.place_and_clear(board, W, *c)
+    return cleared, bitboard.features(after, W)
+
+
+def incremental(board, cands, W=15):
+    ev = IncrementalEvaluator(board, W)
+    return [_score(*ev.evaluate(*c)) for c in cands]
+
+
+def vectorized(board, cands, W=15):
+    return batch.score_placements(board, W, cands, WEIGHTS, LINES_BONUS)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--boards", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    positions = [(b, p, candidates(b, 15, p)) for b, p in midgame_positions(args.boards, args.seed)]
+    n_cands = sum(len(c) for _, _, c in positions) / len(positions)
+    print(f"{len(positions)} mid-game boards, {n_cands:.1f} candidates per decision")
+
+    runs = [("full recompute", full_recompute), ("incremental", incremental)]
+    if batch.available():
+        runs.append(("numpy batch", vectorized))
+    else:
+        print("numpy not installed; skipping the batch path")
+    base = None
+    for name, fn in runs:
+        per = bench(fn, positions, args.repeat)
+        base = base or per
+        print(f"  {name:<15} {per * 1e6:8.1f} us/decision   x{base / per:5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Command queue throughput: the append-only log (`send_cmd.send_command` /
+`CommandReader`) against the old read-modify-write JSON queue.
+
+Enqueue rate is measured at a growing queue length (the JSON queue rewrites
+every entry on each command), dequeue rate by polling after each command
+as the injector does, and `--writers` processes enqueue concurrently to
+count lost commands.
+
+    python benchmarks/bench_command_queue.py --commands 5000 --writers 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from player.send_cmd import CommandReader, send_command
+
+KEYS = "wasd "
+
+
+def send_json(key: str, path: Path) -> bool:
+    """The previous send_command: load the whole queue, append, rewrite."""
+    try:
+        with open(path, "r") as f:
+            queue = json.load(f)
+    except Exception:
+        queue = []
+    queue.append({"key": key, "timestamp": time.time()})
+    with open(path, "w") as f:
+        json.dump(queue, f)
+    return True
+
+
+def count_json(path: Path) -> int:
+    with open(path, "r") as f:
+        return len(json.load(f))
+
+
+def count_log(path: Path) -> int:
+    return len(CommandReader(path, from_start=True).poll())
+
+
+SENDERS = {"log": send_command, "json": send_json}
+COUNTERS = {"log": count_log, "json": count_json}
+
+
+def _writer(kind: str, path: str, n: int) -> None:
+    send = SENDERS[kind]
+    for i in range(n):
+        send(KEYS[i % len(KEYS)], Path(path))
+
+
+def enqueue(kind: str, path: Path, n: int) -> float:
+    """Commands per second over `n` sends."""
+    send = SENDERS[kind]
+    t0 = time.perf_counter()
+    for i in range(n):
+        send(KEYS[i % len(KEYS)], path)
+    return n / (time.perf_counter() - t0)
+
+
+def dequeue(path: Path, n: int) -> float:
+    """Send-then-poll round trips per second for the log."""
+    reader = CommandReader(path)
+    got = 0
+    t0 = time.perf_counter()
+    for i in range(n):
+        send_command(KEYS[i % len(KEYS)], path)
+        got += reader.next_key() is not None
+    elapsed = time.perf_counter() - t0
+    assert got == n, (got, n)
+    return n / elapsed
+
+
+def concurrent(kind: str, path: Path, writers: int, n: int) -> int:
+    procs = [mp.Process(target=_writer, args=(kind, str(path), n)) for _ in range(writers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    return writers * n - COUNTERS[kind](path)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--commands", type=int, default=5000)
+    ap.add_argument("--json-commands", type=int, default=2000,
+                    help="commands for the JSON queue (quadratic; keep it smaller)")
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--per-writer", type=int, default=500)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for kind, n in (("log", args.commands), ("json", args.json_commands)):
+            path = tmp / f"enqueue.{kind}"
+            head = enqueue(kind, path, n // 10)
+            tail = enqueue(kind, path, n - n // 10)
+            print(f"{kind:4s} enqueue: first {n // 10}: {head:9.0f} cmd/s, "
+                  f"next {n - n // 10}: {tail:9.0f} cmd/s, file {os.path.getsize(path) / 1024:.0f} KiB")
+        rate = dequeue(tmp / "roundtrip.log", args.commands)
+        print(f"log  send+poll round trip: {rate:9.0f} cmd/s")
+        for kind in ("log", "json"):
+            lost = concurrent(kind, tmp / f"concurrent.{kind}", args.writers, args.per_writer)
+            print(f"{kind:4s} {args.writers} concurrent writers x {args.per_writer}: {lost} commands lost")
+
+
+if __name__ == "__main__":
+    main()
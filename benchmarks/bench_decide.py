@@ -0,0 +1,268 @@
+"""
+Decision-latency benchmark for `Bot.decide` over a recorded corpus.
+
+The corpus (`benchmarks/data/decide_corpus.json`) holds piece episodes:
+the observations the key injector would hand the bot, every interval,
+from spawn until the piece locks, both in the shape `Grid.get_grid`
+produces ("grid", the piece painted in) and as `engine.snapshot` gives
+them ("board" with locked cells only, plus "board_version"); `--obs`
+picks which form is replayed. Boards range from empty to near-topped-out
+stacks and levels from 1 to 15.
+Each pass replays it through a fresh `Bot` in order, so plan reuse within
+an episode is measured as in the live game, with reach caches cleared.
+
+Reports p50/p95/p99 latency, decisions per second and peak bytes allocated
+per decision (tracemalloc, in a separate pass). `--profile` adds the
+per-stage breakdown from `player.profiling`.
+
+    python benchmarks/bench_decide.py                      # run
+    python benchmarks/bench_decide.py --obs snapshot       # snapshot observations
+    python benchmarks/bench_decide.py --save base.json     # keep results
+    python benchmarks/bench_decide.py --compare base.json  # flag regressions
+    python benchmarks/bench_decide.py --record             # rebuild the corpus
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from player import bitboard, pieces, profiling, reach
+from player.bot import Bot
+from player.evaluator import IncrementalEvaluator
+from tetris.engine import TetrisEngine
+
+CORPUS = Path(__file__).with_name("data") / "decide_corpus.json"
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "alloc_kib")
+OBS_FORMS = {"grid": ("grid",), "snapshot": ("board", "board_version")}
+_FORM_KEYS = {k for keys in OBS_FORMS.values() for k in keys}
+
+
+def _pack(obs, snapshot):
+    out = dict(obs)
+    out["grid"] = ["".join(map(str, row)) for row in obs["grid"]]
+    out["board"] = ["".join(map(str, row)) for row in snapshot["board"]]
+    out["board_version"] = snapshot["board_version"]
+    return out
+
+
+def _unpack(obs, form="grid"):
+    """An observation of the given form; the other form's keys are left out."""
+    missing = [k for k in OBS_FORMS[form] if k not in obs]
+    if missing:
+        raise SystemExit(f"corpus has no {form} observations; rebuild it with --record")
+    out = {k: v for k, v in obs.items() if k not in _FORM_KEYS}
+    if form == "grid":
+        out["grid"] = [[int(c) for c in row] for row in obs["grid"]]
+    else:
+        out["board"] = tuple(tuple(int(c) for c in row) for row in obs["board"])
+        out["board_version"] = obs["board_version"]
+    cur = out.get("current_piece")
+    if cur:
+        cur["cells"] = [tuple(c) for c in cur["cells"]]
+    return out
+
+
+def _fill_move(env, rng, evaluator_weights):
+    """Greedy spawn drop with random blunders, to grow varied stacks."""
+    W = env.cols
+    board = bitboard.from_grid(env.game.grid)
+    rots = pieces.table(W)[env.game.fig.type]
+    cands = [(r, x, bitboard.drop_y(board, W, rot, x))
+             for r, rot in enumerate(rots) for x in range(rot.xmin, rot.xmax + 1)]
+    cands = [c for c in cands if c[2] is not None]
+    if not cands or rng.random() < 0.3:
+        return rng.randrange(4), rng.randrange(-1, W)
+    ev = IncrementalEvaluator(board, W)
+
+    def score(c):
+        cleared, f = ev.evaluate(rots[c[0]], c[1], c[2])
+        return sum(w * v for w, v in zip(evaluator_weights, f)) + Bot.LINES_BONUS * cleared
+    r, x, _ = max(cands, key=score)
+    return r, x
+
+
+def record(episodes: int, seed: int, every: int):
+    """Play blunder-prone games at random levels and keep whole piece episodes."""
+    rng = random.Random(seed)
+    bot = Bot()
+    bot.decide(None)
+    out = []
+    game_seed = seed
+    while len(out) < episodes:
+        env = TetrisEngine(seed=game_seed)
+        game_seed += 1
+        while not env.done and len(out) < episodes:
+            if rng.random() < 0.85:
+                env.step_place(*_fill_move(env, rng, bot._weights))
+                continue
+            env.game.lvl = rng.randint(1, 15)
+            bot = Bot(interval_ms=every * reach.FRAME_MS)
+            episode = []
+            played = env.game.pieces
+            frame = 0
+            while not env.done and env.game.pieces == played and frame < 2000:
+                action = None
+                if frame % every == 0:
+                    obs = env.obs()
+                    episode.append(_pack(obs, env.snapshot()))
+                    action = bot.decide(obs)
+                env.step(action)
+                frame += 1
+            out.append(episode)
+    heights = []
+    for ep in out:
+        obs = _unpack(ep[0])
+        board = bitboard.from_grid(obs["grid"], skip=obs["current_piece"]["cells"])
+        heights.append(bitboard.features(board, env.cols)[3])
+    print(f"recorded {len(out)} episodes, {sum(map(len, out))} observations, "
+          f"stack height {min(heights)}..{max(heights)} (median {statistics.median(heights)})")
+    return out
+
+
+def load(path: Path, form: str = "grid"):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    episodes = [[_unpack(obs, form) for obs in ep] for ep in data["episodes"]]
+    if form == "snapshot":
+        # One board object per version, as consecutive snapshots share it.
+        boards = {}
+        for ep in episodes:
+            for obs in ep:
+                obs["board"] = boards.setdefault(obs["board_version"], obs["board"])
+    return episodes, data["interval_ms"]
+
+
+def replay(episodes, interval_ms: float, vectorized: bool, lookahead: bool):
+    """Latencies (ms) of every decide() call, one fresh Bot per pass."""
+    reach.clear_cache()
+    bot = Bot(vectorized=vectorized, interval_ms=interval_ms, lookahead=lookahead)
+    bot.decide(None)        # loads weights outside the timed region
+    lat = []
+    for ep in episodes:
+        for obs in ep:
+            t0 = time.perf_counter()
+            bot.decide(obs)
+            lat.append((time.perf_counter() - t0) * 1000)
+    return lat
+
+
+def alloc_pass(episodes, interval_ms: float, vectorized: bool, lookahead: bool) -> float:
+    """Mean peak KiB traced per decide() call."""
+    reach.clear_cache()
+    bot = Bot(vectorized=vectorized, interval_ms=interval_ms, lookahead=lookahead)
+    bot.decide(None)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for ep in episodes:
+            for obs in ep:
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                bot.decide(obs)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks) / 1024
+
+
+def percentile(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q / 100 * len(xs)))]
+
+
+def compare(results, baseline, threshold: float) -> bool:
+    """Print a side-by-side table; True when a metric regressed past `threshold` %."""
+    regressed = False
+    for key in LOWER_IS_BETTER + ("decisions_per_s",):
+        old, new = baseline.get(key), results.get(key)
+        if old is None or new is None or not old:
+            continue
+        change = (new - old) / old * 100
+        worse = change > threshold if key in LOWER_IS_BETTER else -change > threshold
+        regressed |= worse
+        print(f"  {key:<16} {old:10.3f} -> {new:10.3f}  {change:+6.1f}%"
+              f"{'  REGRESSION' if worse else ''}")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--corpus", type=Path, default=CORPUS)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--vectorized", action="store_true")
+    ap.add_argument("--lookahead", action="store_true")
+    ap.add_argument("--obs", choices=sorted(OBS_FORMS), default="grid",
+                    help="observation form to replay (default: grid)")
+    ap.add_argument("--save", type=Path, help="write results as JSON")
+    ap.add_argument("--compare", type=Path, help="baseline JSON from --save")
+    ap.add_argument("--threshold", type=float, default=10.0,
+                    help="regression threshold in percent (default 10)")
+    ap.add_argument("--profile", action="store_true",
+                    help="print per-stage counters and timers from one extra pass")
+    ap.add_argument("--record", action="store_true", help="rebuild the corpus and exit")
+    ap.add_argument("--episodes", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--interval-ms", type=float, default=120)
+    args = ap.parse_args()
+
+    if args.record:
+        every = max(1, round(args.interval_ms / reach.FRAME_MS))
+        episodes = record(args.episodes, args.seed, every)
+        args.corpus.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.corpus, "w", encoding="utf-8") as f:
+            json.dump({"interval_ms": args.interval_ms, "episodes": episodes}, f,
+                      separators=(",", ":"))
+        return
+
+    episodes, interval_ms = load(args.corpus, args.obs)
+    n = sum(map(len, episodes))
+    lat = []
+    for _ in range(args.repeat):
+        lat += replay(episodes, interval_ms, args.vectorized, args.lookahead)
+    results = {
+        "decisions": n,
+        "mean_ms": statistics.mean(lat),
+        "p50_ms": percentile(lat, 50),
+        "p95_ms": percentile(lat, 95),
+        "p99_ms": percentile(lat, 99),
+        "decisions_per_s": len(lat) / (sum(lat) / 1000),
+        "alloc_kib": alloc_pass(episodes, interval_ms, args.vectorized, args.lookahead),
+        "vectorized": args.vectorized,
+        "lookahead": args.lookahead,
+        "obs": args.obs,
+    }
+    print(f"{n} {args.obs} observations x {args.repeat}: p50 {results['p50_ms']:.3f} ms  "
+          f"p95 {results['p95_ms']:.3f} ms  p99 {results['p99_ms']:.3f} ms  "
+          f"{results['decisions_per_s']:.0f} decisions/s  "
+          f"{results['alloc_kib']:.1f} KiB peak alloc/decision")
+
+    if args.profile:
+        profiling.enable()
+        profiling.reset()
+        replay(episodes, interval_ms, args.vectorized, args.lookahead)
+        profiling.enable(False)
+        print(profiling.log_line())
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Greedy vs two-ply lookahead (`Bot(lookahead=True)`) in frame-stepped games.
+
+Each game runs on `TetrisEngine.step`, one frame at a time, with the bot
+asked for a key every `--interval-ms` of game time (60 frames per second),
+the way the key injector drives it. Reports decide() latency over all
+calls, lines/pieces per game and, with `--deadline-ms`, the share of
+candidates scored before the budget ran out.
+
+    python benchmarks/bench_lookahead.py --games 5 --beam 4
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from player import reach
+from player.bot import Bot
+from tetris.engine import TetrisEngine
+
+
+def play(bot: Bot, seed: int, every: int, max_pieces: int, deadline_ms=None):
+    """(lines, pieces, decide latencies in ms, coverage per search) for one game."""
+    env = TetrisEngine(seed=seed)
+    lat, cov = [], []
+    frame = 0
+    while not env.done and env.game.pieces < max_pieces:
+        action = None
+        if frame % every == 0:
+            obs = env.obs()
+            t0 = time.perf_counter()
+            action = bot.decide(obs, deadline_ms=deadline_ms)
+            lat.append((time.perf_counter() - t0) * 1000)
+            if bot.last_stats.get("candidates"):
+                cov.append(bot.last_stats["coverage"])
+        env.step(action)
+        frame += 1
+    return env.game.score, env.game.pieces, lat, cov
+
+
+def percentile(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q / 100 * len(xs)))]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--games", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--beam", type=int, default=4)
+    ap.add_argument("--interval-ms", type=float, default=120)
+    ap.add_argument("--max-pieces", type=int, default=1000)
+    ap.add_argument("--vectorized", action="store_true")
+    ap.add_argument("--deadline-ms", type=float, default=None,
+                    help="anytime budget per decide() call; reports search coverage")
+    args = ap.parse_args()
+
+    every = max(1, round(args.interval_ms / reach.FRAME_MS))
+    modes = [("greedy", dict()), (f"lookahead/{args.beam}", dict(lookahead=True, beam=args.beam))]
+    for name, kw in modes:
+        lines, played, lat, cov = [], [], [], []
+        for g in range(args.games):
+            bot = Bot(vectorized=args.vectorized, interval_ms=args.interval_ms, **kw)
+            l, p, t, c = play(bot, args.seed + g, every, args.max_pieces, args.deadline_ms)
+            lines.append(l)
+            played.append(p)
+            lat += t
+            cov += c
+        print(f"{name:<13} lines/game {statistics.mean(lines):7.1f}  pieces/game "
+              f"{statistics.mean(played):7.1f}  decide ms mean {statistics.mean(lat):6.2f}  "
+              f"p95 {percentile(lat, 95):6.2f}  max {max(lat):6.2f}  "
+              f"coverage {statistics.mean(cov):5.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Games-to-target fitness for the trainer's optimizers (GA, CMA-ES, CEM).
+
+Each run starts from the trainer's `BASE_W` with its own seed and plays
+generations through the trainer's evaluation back end (`run_jobs`, common
+random numbers, fitness memo) until a generation's best genome averages
+`--target` lines over its games, or `--generations` runs out. Games count
+what was actually played; memo hits are free.
+
+    python benchmarks/bench_optimizers.py --runs 5 --target 75 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for path in (PROJECT_ROOT, PROJECT_ROOT / "modeltraining"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from optimizers import OPTIMIZERS, make_optimizer
+from train_gui_ga import (BASE_W, ENGINES, FitnessMemo, TrainConfig, eval_genome,
+                          genome_seeds, pieces_spec, run_jobs)
+
+
+def run(executor, cfg: TrainConfig, target: float):
+    """(games played until the target was reached or None, generations, best fitness seen)."""
+    rng = random.Random(cfg.seed)
+    opt = make_optimizer(cfg.optimizer, cfg, BASE_W, rng)
+    memo = FitnessMemo()
+    spec = pieces_spec(cfg)
+    best = float("-inf")
+    for gen in range(1, cfg.generations + 1):
+        pop = opt.ask(rng)
+        seeds = [genome_seeds(cfg, gen, i) for i in range(cfg.pop)]
+        jobs = [(i, s) for i in range(cfg.pop) for s in seeds[i]]
+        results = run_jobs(executor, cfg, pop, jobs, spec, memo)
+        ranked = sorted(((eval_genome(results, i, seeds[i])[0], w) for i, w in enumerate(pop)),
+                        key=lambda t: -t[0])
+        best = max(best, ranked[0][0])
+        if ranked[0][0] >= target:
+            return memo.misses, gen, best
+        opt.tell(ranked, rng)
+    return None, cfg.generations, best
+
+
+def main() -> None:
+    d = TrainConfig()
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--optimizers", default=",".join(OPTIMIZERS),
+                    help="comma-separated optimizers to compare")
+    ap.add_argument("--runs", type=int, default=5, help="independent runs per optimizer")
+    ap.add_argument("--target", type=float, default=75.0,
+                    help="lines per game to reach (at most 80 in 300 pieces)")
+    ap.add_argument("--generations", type=int, default=15, help="generations before giving up")
+    ap.add_argument("--pop", type=int, default=d.pop)
+    ap.add_argument("--elite", type=int, default=d.elite)
+    ap.add_argument("--mut-std", type=float, default=d.mut_std)
+    ap.add_argument("--games-per-eval", type=int, default=d.games_per_eval)
+    ap.add_argument("--max-pieces", type=int, default=300)
+    ap.add_argument("--workers", type=int, default=d.workers)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--engine", choices=sorted(ENGINES), default="place",
+                    help="evaluation engine; the fast place stand-in by default, "
+                         "which is enough to compare optimizers")
+    args = ap.parse_args()
+
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    print(f"target {args.target:g} lines, {args.max_pieces} pieces per game, pop {args.pop}, "
+          f"{args.games_per_eval} games per genome, up to {args.generations} generations")
+    try:
+        for name in args.optimizers.split(","):
+            reached, gens, bests = [], [], []
+            t0 = time.perf_counter()
+            for r in range(args.runs):
+                cfg = TrainConfig(optimizer=name, pop=args.pop, elite=args.elite,
+                                  mut_std=args.mut_std, games_per_eval=args.games_per_eval,
+                                  max_pieces=args.max_pieces, generations=args.generations,
+                                  workers=args.workers, seed=args.seed + r, checkpoint="",
+                                  engine=args.engine)
+                games, gen, best = run(executor, cfg, args.target)
+                print(f"  {name:6s} run {r}: "
+                      + (f"{games} games, generation {gen}" if games is not None else "not reached")
+                      + f", best {best:.1f}", flush=True)
+                bests.append(best)
+                if games is not None:
+                    reached.append(games)
+                    gens.append(gen)
+            wall = time.perf_counter() - t0
+            print(f"{name:6s} reached {len(reached)}/{args.runs}"
+                  + (f", median {statistics.median(reached):.0f} games "
+                     f"({statistics.median(gens):.0f} generations)" if reached else "")
+                  + f", mean best {statistics.mean(bests):.1f}, {wall:.1f} s", flush=True)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Rendering cost of the GUI loop: the dirty-rect `tetris.tetris.Renderer`
+against the previous full redraw (fill, grid lines, every cell, a freshly
+scaled sprite per active-piece cell, `display.update()` of the window).
+
+Both draw the same seeded bot game frame by frame under the SDL dummy
+video driver, without the 60 FPS clock, so the figures are render-only
+frames per second. A check pass draws both into off-screen surfaces and
+compares them pixel for pixel on every frame.
+
+    python benchmarks/bench_render.py --frames 3000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pygame
+
+from player import reach
+from player.bot import Bot
+from tetris import tetris as gui
+from tetris.engine import TetrisEngine
+
+
+def full_redraw(surface, game) -> None:
+    """The previous dev_main drawing code, onto `surface`."""
+    surface.fill(gui.bg_color)
+    gui.draw_grid_lines(surface)
+    for x in range(gui.rows):
+        for y in range(gui.cols):
+            if game.grid[x][y] > 0:
+                img = gui.assets[game.grid[x][y]]
+                surface.blit(img, (y * gui.cell, x * gui.cell))
+                pygame.draw.rect(surface, gui.white, (y * gui.cell, x * gui.cell, gui.cell, gui.cell), 1)
+    if game.fig:
+        for i in range(4):
+            for j in range(4):
+                if (i * 4 + j) in game.fig.img():
+                    img = pygame.transform.scale(gui.assets[game.fig.color], (gui.cell - 2, gui.cell - 2))
+                    surface.blit(img, ((game.fig.x + j) * gui.cell + 1, (game.fig.y + i) * gui.cell + 1))
+    if game.next:
+        for i in range(4):
+            for j in range(4):
+                if (i * 4 + j) in game.next.img():
+                    img = gui.assets[game.next.color]
+                    surface.blit(img, ((game.next.x + j - 4) * gui.cell,
+                                       (game.next.y + i) * gui.cell + gui.height - 100))
+    if game.end:
+        game.end_game(surface)
+    score_txt = gui.font.render(f"{game.score}", True, gui.white)
+    lvl_txt = gui.font_2.render(f"Level: {game.lvl}", True, gui.white)
+    surface.blit(score_txt, (250 - score_txt.get_width() // 2, gui.height - 120))
+    surface.blit(lvl_txt, (250 - score_txt.get_width() // 2, gui.height - 30))
+
+
+def frames(seed: int, n: int, every: int):
+    """Yield the game after each of `n` frames of a bot game (restarting on game over)."""
+    bot = Bot(interval_ms=every * reach.FRAME_MS)
+    env = TetrisEngine(gui.rows, gui.cols, seed=seed, game_cls=gui.tetris)
+    for frame in range(n):
+        if env.done:
+            yield env.game          # one frame of the game over screen
+            env.reset(seed + frame)
+        action = bot.decide(env.obs()) if frame % every == 0 else None
+        env.step(action)
+        yield env.game
+
+
+def timed(mode: str, seed: int, n: int, every: int):
+    """(render-only seconds, frames, mean rects pushed per frame)."""
+    screen = gui.screen
+    renderer = gui.Renderer(screen)
+    elapsed = 0.0
+    rects = count = 0
+    for game in frames(seed, n, every):
+        t0 = time.perf_counter()
+        if mode == "full":
+            full_redraw(screen, game)
+            pygame.display.update()
+            rects += 1
+        else:
+            rects += len(renderer.update(game))
+        elapsed += time.perf_counter() - t0
+        count += 1
+    return elapsed, count, rects / count
+
+
+def check(seed: int, n: int, every: int):
+    """(frames, frames whose pixels differ between the two renderers)."""
+    size = gui.screen.get_size()
+    ref = pygame.Surface(size).convert()
+    out = pygame.Surface(size).convert()
+    renderer = gui.Renderer(out)
+    count = bad = 0
+    for game in frames(seed, n, every):
+        full_redraw(ref, game)
+        renderer.draw(game)
+        count += 1
+        bad += pygame.image.tobytes(ref, "RGB") != pygame.image.tobytes(out, "RGB")
+    return count, bad
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--frames", type=int, default=3000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--every", type=int, default=2, help="frames between bot decisions")
+    args = ap.parse_args()
+
+    count, bad = check(args.seed, args.frames, args.every)
+    print(f"pixel check: {count - bad}/{count} frames identical")
+    base = None
+    for mode in ("full", "dirty"):
+        elapsed, count, rects = timed(mode, args.seed, args.frames, args.every)
+        fps = count / elapsed
+        base = base or fps
+        print(f"{mode:5s}: {elapsed / count * 1000:.3f} ms/frame, {fps:8.0f} FPS "
+              f"({fps / base:.1f}x), {rects:.1f} rects/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Decision server under load: `--games` client processes play frame-stepped
+games at once through one `player.server.DecisionServer`, the way several
+GUI instances with BOT_SERVER set would.
+
+Reports client round-trip latency, the server's own per-request latency
+and batch sizes, and checks every game against the same game played with
+an in-process `Bot(vectorized=True)`: the keys pressed must be identical.
+
+    python benchmarks/bench_server.py --games 8 --max-pieces 60
+    python benchmarks/bench_server.py --listen 127.0.0.1:7777
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing as mp
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from player import reach
+from player.bot import Bot
+from player.server import DecisionClient, DecisionServer
+from tetris.engine import TetrisEngine
+
+
+def play(decide, seed: int, max_pieces: int, interval_ms: float):
+    """(lines, pieces, digest of the keys pressed, decide latencies in ms)."""
+    every = max(1, round(interval_ms / reach.FRAME_MS))
+    env = TetrisEngine(seed=seed)
+    keys = hashlib.sha1()
+    lat = []
+    frame = 0
+    while not env.done and env.game.pieces < max_pieces:
+        action = None
+        if frame % every == 0:
+            obs = env.obs()
+            t0 = time.perf_counter()
+            action = decide(obs)
+            lat.append((time.perf_counter() - t0) * 1000)
+            keys.update(repr(action).encode())
+        env.step(action)
+        frame += 1
+    return env.game.score, env.game.pieces, keys.hexdigest(), lat
+
+
+def _client(args):
+    address, seed, max_pieces, interval_ms = args
+    client = DecisionClient(address, game=f"bench-{seed}", interval_ms=interval_ms)
+    try:
+        return play(client.decide, seed, max_pieces, interval_ms)
+    finally:
+        client.close()
+
+
+def _serve(server: DecisionServer, address: str, ready: threading.Event) -> None:
+    async def run():
+        srv = await server.start(address)
+        ready.set()
+        try:
+            async with srv:
+                await srv.serve_forever()
+        finally:
+            await server.close()
+    asyncio.run(run())
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--games", type=int, default=8)
+    ap.add_argument("--max-pieces", type=int, default=60)
+    ap.add_argument("--interval-ms", type=float, default=120.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--listen", default=None, help='"HOST:PORT" or "unix:PATH" (default: a temp Unix socket)')
+    ap.add_argument("--window-ms", type=float, default=2.0)
+    ap.add_argument("--max-batch", type=int, default=64)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        address = args.listen or f"unix:{tmp}/bot.sock"
+        server = DecisionServer(args.window_ms, args.max_batch)
+        ready = threading.Event()
+        threading.Thread(target=_serve, args=(server, address, ready), daemon=True).start()
+        ready.wait()
+
+        seeds = [args.seed + g for g in range(args.games)]
+        t0 = time.perf_counter()
+        with mp.get_context("spawn").Pool(args.games) as pool:
+            served = pool.map(_client, [(address, s, args.max_pieces, args.interval_ms) for s in seeds])
+        wall = time.perf_counter() - t0
+
+    same = 0
+    for seed, (lines, pieces, digest, _) in zip(seeds, served):
+        ref = play(Bot(vectorized=True, interval_ms=args.interval_ms).decide, seed,
+                   args.max_pieces, args.interval_ms)
+        same += ref[2] == digest
+        print(f"  seed {seed}: {lines} lines / {pieces} pieces"
+              f"{'' if ref[2] == digest else f'  MISMATCH (in-process {ref[0]} / {ref[1]})'}")
+    rtt = sorted(x for *_, lat in served for x in lat)
+    st = server.stats()
+    print(f"{args.games} games, {len(rtt)} decisions in {wall:.1f} s ({len(rtt) / wall:.0f} decisions/s)")
+    print(f"client round trip: p50 {statistics.median(rtt):.3f} ms, "
+          f"p95 {rtt[int(0.95 * (len(rtt) - 1))]:.3f} ms, max {rtt[-1]:.3f} ms")
+    lat = st["latency_ms"]
+    print(f"server latency: mean {lat['mean']:.3f} ms, p50 {lat['p50']:.3f} ms, "
+          f"p95 {lat['p95']:.3f} ms, p99 {lat['p99']:.3f} ms")
+    b = st["batches"]
+    print(f"batches: {b['count']}, mean size {b['mean_size']:.2f}, max {b['max_size']}, "
+          f"mean scored per batch {b['mean_planned']:.2f}")
+    print(f"identical to in-process Bot: {same}/{args.games}")
+
+
+if __name__ == "__main__":
+    main()
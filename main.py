@@ -1,4 +1,4 @@
-from tetris.tetris import dev_main
+from tetris.tetris import main
 
 if __name__ == "__main__":
-    dev_main()
+    main()
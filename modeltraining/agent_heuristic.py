@@ -0,0 +1,65 @@
+from __future__ import annotations
+from typing import Optional, Tuple
+
+import sys
+from pathlib import Path
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from tetris.engine import COLS as W, SPAWN_X, SPAWN_Y
+from player import bitboard, reach
+from player.bitboard import Board
+from player.cache import FeatureCache
+from player.evaluator import IncrementalEvaluator
+from player.pieces import table
+
+ROTATIONS = table(W)
+
+BASE_W = (-0.510066, -0.35663, -0.184483, -0.18, -0.15, -0.30)
+LINES_BONUS = 0.760666
+
+def features(board: Board) -> Tuple[float, ...]:
+    return bitboard.features(board, W)[:6]
+
+def reachable_move_first(board: Board, piece: str, target_rot: int, target_x: int) -> bool:
+    # Straight drop of (target_rot, target_x) is a lock state of the spawn
+    # search; the search is memoized, so all candidates share one pass.
+    locks = reach.search(board, W, piece, (SPAWN_X, SPAWN_Y, 0))
+    y = bitboard.drop_y(board, W, ROTATIONS[piece][target_rot], target_x)
+    return (target_rot, target_x, y) in locks
+
+class HeuristicAgent:
+    def __init__(self, weights=None, cache: Optional[FeatureCache] = None):
+        self.w = list(weights) if weights is not None else list(BASE_W)
+        # Feature vectors are weight-independent; one cache can serve
+        # every genome (and the live Bot).
+        self.cache = cache
+
+    def _score_features(self, f: Tuple[float, ...], lines_cleared: int) -> float:
+        return sum(wi * fi for wi, fi in zip(self.w, f)) + LINES_BONUS * lines_cleared
+
+    def choose_action(self, env_like) -> Tuple[int, int]:
+        board = bitboard.from_grid(env_like.board)
+        piece = env_like.piece
+        best = None
+        tops = bitboard.surface(board, W)
+        evaluator = IncrementalEvaluator(board, W, self.cache)
+        for r_idx, mask in enumerate(ROTATIONS[piece]):
+            for x in range(mask.xmin, mask.xmax + 1):
+                y = bitboard.landing_y(board, W, tops, mask, x)
+                if y is None:
+                    continue
+
+                if not reachable_move_first(board, piece, r_idx, x):
+                    continue
+
+                cleared, f = evaluator.evaluate(mask, x, y)
+
+                s = self._score_features(f[:6], cleared)
+                if best is None or s > best[0]:
+                    best = (s, r_idx, x)
+
+        if best is None:
+            return (0, max(0, min(W - 4, W // 2 - 2)))
+        return best[1], best[2]
@@ -0,0 +1,282 @@
+"""
+Multi-node evaluation for the GA trainer over plain TCP.
+
+The trainer runs a `Coordinator` in place of its process pool
+(`train_gui_ga.py --serve HOST:PORT`) and workers on any machine connect
+to it:
+
+    GA_TOKEN=... python distributed.py worker --connect trainer-host:5555
+
+Both sides share a secret token (`GA_TOKEN`; the trainer makes one up and
+prints it when unset) and prove they know it before any job is sent: the
+coordinator opens with a random challenge, the worker answers with an
+HMAC of it plus a challenge of its own, and the coordinator answers that.
+The token itself never crosses the wire. Messages are JSON objects, one
+per line:
+
+    coordinator -> worker   {"type": "challenge", "nonce": hex}
+    worker -> coordinator   {"type": "hello", "name": ..., "proof": hex, "nonce": hex}
+    coordinator -> worker   {"type": "welcome", "proof": hex}
+    worker -> coordinator   {"type": "heartbeat"}
+                            {"type": "result", "id": n, "result": ...}
+                            {"type": "error", "id": n, "message": ...}
+    coordinator -> worker   {"type": "job", "id": n, "fn": name, "args": [...]}
+                            {"type": "stop"}
+
+Workers pull one job at a time: the coordinator sends the next queued job
+as soon as a worker's previous result is in. A job names one of the
+worker's `JOBS` (only `train_gui_ga._run_chunk`, a chunk of (weights,
+seed) games) and its arguments; anything else gets an error reply. Weights and seeds survive JSON exactly, so results are identical
+to a single-node run. Workers heartbeat while they compute; a worker
+silent for `timeout` seconds, or whose connection drops, is dropped and
+its job goes back to the queue for the next worker.
+
+Sequence pools live in one machine's shared memory, so remote workers
+generate their own pieces; a `--pieces` sequence file must exist at the
+same path on every worker.
+"""
+from __future__ import annotations
+import argparse, hashlib, hmac, json, os, queue, secrets, socket, threading, time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+HEARTBEAT_S = 2.0
+TIMEOUT_S = 10.0
+TOKEN_ENV = "GA_TOKEN"
+# The only functions a job may name, resolved from train_gui_ga on the worker.
+JOB_NAMES = ("_run_chunk",)
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _proof(token: str, role: str, nonce: str) -> str:
+    return hmac.new(token.encode(), f"{role}:{nonce}".encode(), hashlib.sha256).hexdigest()
+
+
+def _send(sock: socket.socket, msg: Dict[str, Any], lock: Optional[threading.Lock] = None) -> None:
+    data = (json.dumps(msg) + "\n").encode()
+    if lock is None:
+        sock.sendall(data)
+    else:
+        with lock:
+            sock.sendall(data)
+
+
+class WorkerStats:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.since = time.perf_counter()
+        self.jobs = 0
+        self.games = 0
+        self.busy = 0.0
+        self.requeued = 0
+        self.alive = True
+
+    def line(self) -> str:
+        wall = time.perf_counter() - self.since
+        return (f"{self.name}: {self.jobs} jobs, {self.games} games, "
+                f"{self.games / max(1e-9, self.busy):.1f} games/s busy, "
+                f"{self.games / max(1e-9, wall):.1f} games/s overall"
+                f"{f', {self.requeued} requeued' if self.requeued else ''}"
+                f"{'' if self.alive else ' (gone)'}")
+
+
+class Coordinator:
+    """
+    Job queue served to TCP workers, with the `submit`/`shutdown` subset of
+    `concurrent.futures.Executor` that `train_gui_ga.run_jobs` uses.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, timeout: float = TIMEOUT_S,
+                 token: Optional[str] = None) -> None:
+        self.timeout = timeout
+        # Shared secret workers must prove; made up when neither given nor set.
+        self.token = token or os.getenv(TOKEN_ENV) or secrets.token_hex(16)
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()[:2]
+        self.jobs: "queue.Queue[Tuple[int, str, list, Future]]" = queue.Queue()
+        self.stats: Dict[str, WorkerStats] = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        if fn.__name__ not in JOB_NAMES:
+            raise ValueError(f"workers do not run {fn.__name__!r}")
+        future: Future = Future()
+        with self._lock:
+            self._ids += 1
+            job_id = self._ids
+        self.jobs.put((job_id, fn.__name__, list(args), future))
+        return future
+
+    def report(self) -> List[str]:
+        with self._lock:
+            return [s.line() for s in self.stats.values()]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting workers and tell connected ones to exit."""
+        self._stopping.set()
+        self.server.close()
+        if wait:
+            for t in list(self._threads):
+                t.join(self.timeout)
+
+    def _accept(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            t = threading.Thread(target=self._serve, args=(conn,), daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _serve(self, conn: socket.socket) -> None:
+        conn.settimeout(self.timeout)
+        lines = conn.makefile("r", encoding="utf-8")
+        stats = None
+        job = None
+        try:
+            nonce = secrets.token_hex(16)
+            _send(conn, {"type": "challenge", "nonce": nonce})
+            hello = json.loads(lines.readline() or "{}")
+            if not isinstance(hello, dict) or hello.get("type") != "hello" or not hmac.compare_digest(
+                    str(hello.get("proof", "")), _proof(self.token, "worker", nonce)):
+                return
+            _send(conn, {"type": "welcome",
+                         "proof": _proof(self.token, "coordinator", str(hello.get("nonce", "")))})
+            with self._lock:
+                name = str(hello.get("name") or f"worker{len(self.stats) + 1}")
+                while name in self.stats:
+                    name += "+"
+                stats = self.stats[name] = WorkerStats(name)
+            while not self._stopping.is_set():
+                try:
+                    job = self.jobs.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                job_id, fn, args, future = job
+                if future.cancelled():
+                    job = None
+                    continue
+                t0 = time.perf_counter()
+                _send(conn, {"type": "job", "id": job_id, "fn": fn, "args": args})
+                while True:
+                    line = lines.readline()
+                    if not line:
+                        raise ConnectionError("worker disconnected")
+                    msg = json.loads(line)
+                    if not isinstance(msg, dict):
+                        raise ValueError(f"not a message: {line!r}")
+                    if msg.get("id") == job_id:
+                        break
+                stats.busy += time.perf_counter() - t0
+                stats.jobs += 1
+                if msg.get("type") == "result":
+                    result = msg["result"]
+                    stats.games += len(result) if isinstance(result, list) else 1
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(f"{stats.name}: {msg.get('message')}"))
+                job = None
+            _send(conn, {"type": "stop"})
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # Timed out (no heartbeat), dropped or garbled: hand the job on.
+            if job is not None:
+                self.jobs.put(job)
+                if stats is not None:
+                    stats.requeued += 1
+        finally:
+            if stats is not None:
+                stats.alive = False
+            conn.close()
+
+
+def run_worker(address: str, name: Optional[str] = None, retry_s: float = 30.0,
+               heartbeat: float = HEARTBEAT_S, token: Optional[str] = None) -> int:
+    """
+    Serve jobs from the coordinator at `address` until told to stop; returns
+    jobs done. Raises PermissionError if the coordinator does not prove it
+    holds `token` (default: $GA_TOKEN).
+    """
+    import train_gui_ga
+    token = token or os.getenv(TOKEN_ENV)
+    if not token:
+        raise PermissionError(f"no token: pass --token or set {TOKEN_ENV}")
+    jobs = {fn: getattr(train_gui_ga, fn) for fn in JOB_NAMES}
+    host, port = parse_address(address)
+    deadline = time.monotonic() + retry_s
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(heartbeat):
+            try:
+                _send(sock, {"type": "heartbeat"}, lock)
+            except OSError:
+                return
+
+    lines = sock.makefile("r", encoding="utf-8")
+    done = 0
+    try:
+        challenge = json.loads(lines.readline() or "{}")
+        nonce = secrets.token_hex(16)
+        _send(sock, {"type": "hello", "name": name or f"{socket.gethostname()}:{os.getpid()}",
+                     "proof": _proof(token, "worker", str(challenge.get("nonce", ""))),
+                     "nonce": nonce}, lock)
+        welcome = json.loads(lines.readline() or "{}")
+        if welcome.get("type") != "welcome" or not hmac.compare_digest(
+                str(welcome.get("proof", "")), _proof(token, "coordinator", nonce)):
+            raise PermissionError(f"{address} rejected the token or did not prove it holds it")
+        threading.Thread(target=beat, daemon=True).start()
+        for line in lines:
+            msg = json.loads(line)
+            if msg["type"] == "stop":
+                break
+            try:
+                fn = jobs.get(msg.get("fn"))
+                if fn is None:
+                    raise PermissionError(f"job {msg.get('fn')!r} is not allowed")
+                out = fn(*msg["args"])
+                reply = {"type": "result", "id": msg["id"], "result": out}
+            except Exception as e:
+                reply = {"type": "error", "id": msg["id"], "message": f"{type(e).__name__}: {e}"}
+            _send(sock, reply, lock)
+            done += 1
+    finally:
+        stop.set()
+        sock.close()
+    return done
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="GA evaluation worker")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("worker", help="pull and play evaluation jobs from a trainer")
+    w.add_argument("--connect", required=True, metavar="HOST:PORT")
+    w.add_argument("--name", default=None, help="name in the trainer's throughput report")
+    w.add_argument("--retry", type=float, default=30.0,
+                   help="seconds to keep retrying until the trainer is up")
+    w.add_argument("--token", default=None,
+                   help=f"shared token printed by the trainer (default: ${TOKEN_ENV})")
+    args = ap.parse_args(argv)
+    done = run_worker(args.connect, args.name, args.retry, token=args.token)
+    print(f"worker done: {done} jobs", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Weight-search strategies for the trainer, behind one ask/tell interface:
+
+    opt = make_optimizer("cmaes", cfg, BASE_W, rng)
+    for gen in ...:
+        pop = opt.ask(rng)                      # genomes to evaluate
+        ranked = ...                            # [(fitness, weights)], best first
+        opt.tell(ranked, rng)
+
+`ranked` comes from the trainer's evaluation (fixed budget or racing, any
+engine), so every optimizer shares it. All randomness is drawn from the
+trainer's `rng`, and `state()` / `load()` round-trip through the
+checkpoint's JSON, so resumed runs stay reproducible.
+
+    ga     elitism, single-point crossover and Gaussian mutation (the
+           original trainer)
+    cmaes  CMA-ES with rank-mu and rank-one covariance updates (needs
+           NumPy); `mut_std` is the initial step size
+    cem    noisy cross-entropy: a diagonal Gaussian refitted to the
+           `elite` best genomes, with extra variance that fades out over
+           the first generations so the search does not collapse early
+"""
+from __future__ import annotations
+import math
+import random
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional
+    np = None
+
+Ranked = Sequence[Tuple[float, List[float]]]
+
+
+def mutate(weights: List[float], rng: random.Random, cfg) -> List[float]:
+    w = list(weights)
+    for i in range(len(w)):
+        if rng.random() < cfg.mut_rate:
+            w[i] += rng.gauss(0.0, cfg.mut_std)
+    return w
+
+def crossover(a: List[float], b: List[float], rng: random.Random) -> List[float]:
+    cut = rng.randrange(1, len(a))
+    return a[:cut] + b[cut:]
+
+
+class Optimizer(ABC):
+    name = ""
+
+    @abstractmethod
+    def ask(self, rng: random.Random) -> List[List[float]]:
+        """The genomes to evaluate this generation."""
+
+    @abstractmethod
+    def tell(self, ranked: Ranked, rng: random.Random) -> None:
+        """Update from this generation's (fitness, weights), best first."""
+
+    @abstractmethod
+    def state(self) -> Dict[str, Any]:
+        """JSON-serializable state for the checkpoint."""
+
+    @abstractmethod
+    def load(self, state: Dict[str, Any]) -> None:
+        """Restore a `state()`."""
+
+
+class GA(Optimizer):
+    name = "ga"
+
+    def __init__(self, cfg, start: Sequence[float], rng: random.Random) -> None:
+        self.cfg = cfg
+        self.pop = [[w + rng.gauss(0, 0.05) for w in start] for _ in range(cfg.pop)]
+
+    def ask(self, rng: random.Random) -> List[List[float]]:
+        return self.pop
+
+    def tell(self, ranked: Ranked, rng: random.Random) -> None:
+        elites = [w for _, w in ranked[:self.cfg.elite]]
+        next_pop = elites[:]
+        while len(next_pop) < self.cfg.pop:
+            p1, p2 = rng.sample(elites, 2)
+            child = crossover(p1, p2, rng)
+            child = mutate(child, rng, self.cfg)
+            next_pop.append(child)
+        self.pop = next_pop
+
+    def state(self) -> Dict[str, Any]:
+        return {"population": self.pop}
+
+    def load(self, state: Dict[str, Any]) -> None:
+        self.pop = state["population"]
+
+
+class CMAES(Optimizer):
+    name = "cmaes"
+
+    def __init__(self, cfg, start: Sequence[float], rng: random.Random) -> None:
+        if np is None:
+            raise RuntimeError("CMA-ES needs numpy; use --optimizer ga or cem")
+        n = len(start)
+        self.lam = cfg.pop
+        self.mu = max(1, self.lam // 2)
+        w = np.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = w / w.sum()
+        self.mueff = 1.0 / float((self.weights ** 2).sum())
+        mueff = self.mueff
+        self.cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+        self.cs = (mueff + 2) / (n + mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + mueff)
+        self.cmu = min(1 - self.c1, 2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff))
+        self.damps = 1 + 2 * max(0.0, math.sqrt((mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n * n))
+        self.mean = np.array(start, dtype=float)
+        self.sigma = cfg.mut_std
+        self.C = np.eye(n)
+        self.pc = np.zeros(n)
+        self.ps = np.zeros(n)
+        self.gen = 0
+
+    def _eigen(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        self.C = (self.C + self.C.T) / 2
+        d2, B = np.linalg.eigh(self.C)
+        return B, np.sqrt(np.maximum(d2, 1e-20))
+
+    def ask(self, rng: random.Random) -> List[List[float]]:
+        B, D = self._eigen()
+        n = len(self.mean)
+        pop = []
+        for _ in range(self.lam):
+            z = np.array([rng.gauss(0.0, 1.0) for _ in range(n)])
+            pop.append((self.mean + self.sigma * (B @ (D * z))).tolist())
+        return pop
+
+    def tell(self, ranked: Ranked, rng: random.Random) -> None:
+        n = len(self.mean)
+        B, D = self._eigen()
+        ys = np.array([(np.array(w) - self.mean) / self.sigma for _, w in ranked[:self.mu]])
+        weights = self.weights[:len(ys)] / self.weights[:len(ys)].sum()
+        y_w = weights @ ys
+        self.mean = self.mean + self.sigma * y_w
+        self.gen += 1
+        inv_sqrt_c = B @ np.diag(1 / D) @ B.T
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(self.cs * (2 - self.cs) * self.mueff) * (inv_sqrt_c @ y_w)
+        ps_norm = float(np.linalg.norm(self.ps))
+        hsig = ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * self.gen)) / self.chi_n < 1.4 + 2 / (n + 1)
+        self.pc = (1 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2 - self.cc) * self.mueff) * y_w
+        rank_mu = (ys.T * weights) @ ys
+        self.C = ((1 - self.c1 - self.cmu) * self.C
+                  + self.c1 * (np.outer(self.pc, self.pc) + (1 - hsig) * self.cc * (2 - self.cc) * self.C)
+                  + self.cmu * rank_mu)
+        self.sigma *= math.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+
+    def state(self) -> Dict[str, Any]:
+        return {"mean": self.mean.tolist(), "sigma": self.sigma, "C": self.C.tolist(),
+                "pc": self.pc.tolist(), "ps": self.ps.tolist(), "gen": self.gen}
+
+    def load(self, state: Dict[str, Any]) -> None:
+        self.mean = np.array(state["mean"])
+        self.sigma = state["sigma"]
+        self.C = np.array(state["C"])
+        self.pc = np.array(state["pc"])
+        self.ps = np.array(state["ps"])
+        self.gen = state["gen"]
+
+
+class CEM(Optimizer):
+    name = "cem"
+    NOISE_GENERATIONS = 20      # extra variance fades to zero over this many generations
+
+    def __init__(self, cfg, start: Sequence[float], rng: random.Random) -> None:
+        self.cfg = cfg
+        self.mean = list(start)
+        self.std = [cfg.mut_std] * len(start)
+        self.gen = 0
+
+    def noise(self) -> float:
+        """Extra variance added to the refit, fading linearly to zero."""
+        return self.cfg.mut_std ** 2 * max(0.0, 1 - self.gen / self.NOISE_GENERATIONS)
+
+    def ask(self, rng: random.Random) -> List[List[float]]:
+        return [[m + s * rng.gauss(0.0, 1.0) for m, s in zip(self.mean, self.std)]
+                for _ in range(self.cfg.pop)]
+
+    def tell(self, ranked: Ranked, rng: random.Random) -> None:
+        elites = [w for _, w in ranked[:self.cfg.elite]]
+        self.gen += 1
+        noise = self.noise()
+        self.mean = [sum(col) / len(col) for col in zip(*elites)]
+        self.std = [math.sqrt(sum((x - m) ** 2 for x in col) / len(col) + noise)
+                    for col, m in zip(zip(*elites), self.mean)]
+
+    def state(self) -> Dict[str, Any]:
+        return {"mean": self.mean, "std": self.std, "gen": self.gen}
+
+    def load(self, state: Dict[str, Any]) -> None:
+        self.mean, self.std, self.gen = state["mean"], state["std"], state["gen"]
+
+
+OPTIMIZERS = {"ga": GA, "cmaes": CMAES, "cem": CEM}
+
+
+def make_optimizer(name: str, cfg, start: Sequence[float], rng: random.Random) -> Optimizer:
+    return OPTIMIZERS[name](cfg, start, rng)
@@ -0,0 +1,493 @@
+"""
+Genetic Algorithm trainer for the bot's feature weights.
+
+`--optimizer cmaes` or `cem` swaps the GA for CMA-ES or a noisy
+cross-entropy method (`optimizers.py`); evaluation, racing, checkpoints
+and workers are the same for all three.
+
+Every game runs on the headless `tetris.engine`, parameterized by seed and
+weights, so population size and worker count are independent settings:
+
+    python train_gui_ga.py --pop 32 --workers 16 --generations 20
+
+Games are the unit of work. A generation's (genome, seed) games are cut
+into chunks and spread over one process pool, so a slow genome occupies a
+single worker for one chunk instead of holding back the whole generation.
+`--workers` defaults to the machine's core count.
+
+Common random numbers: with `--crn` (default) every genome of a generation
+plays the same seeds, so fitness differences come from the weights, not
+from luckier piece sequences. `--pieces` picks the generator (uniform
+random, 7-bag, or a sequence file, see `tetris.generators`); with more
+than one worker the generation's sequences are pre-generated once into a
+shared-memory `SequencePool` that every worker reads.
+
+Racing (`--racing`): each genome first plays `--race-min` of its seeds;
+after every round the survivors' budget doubles, up to `--games-per-eval`.
+Between rounds, genomes outside the top `elite` whose mean is below the
+elite cut-off by more than `--race-z` standard errors on both sides (pooled
+within-genome variance) are dropped, at most half of the field per round,
+and the race stops once only the elites are left. Dropped genomes rank
+below every survivor, so elites always come from fully raced genomes. The
+log shows the games saved against the fixed budget.
+
+Checkpoints: after every `--checkpoint-every` generations the population,
+RNG state, best genome, per-genome results and the fitness memo are
+written atomically to `--checkpoint`; `--resume PATH` continues that run
+with its saved settings (only `--generations`, `--workers`, `--out` and
+`--serve` may change)
+and ends with the same weights as an uninterrupted run. The fitness memo
+keeps (lines, pieces) per (weights, seed), so a genome is never replayed
+on a seed it already played; with `--fixed-seeds` every generation plays
+the same seeds and elites carried over are not re-evaluated at all.
+
+Multi-node: `--serve HOST:PORT` hands the same chunks to workers on other
+machines over TCP (`distributed.py`); results match a single-node run.
+
+Engines:
+  frames  (default) the live `player.bot.Bot` on `TetrisEngine.step`, one
+          key every BOT_INTERVAL_MS of game time, as the GUI played it
+  place   spawn-drop policy through `TetrisEngine.step_place` (batch_sim);
+          chunks run as one NumPy batch when NumPy is installed. Much
+          faster, but a stand-in: it drops from the spawn column with no
+          reachability search, tucks or gravity, so the weights it finds
+          are tuned for a different policy than the bot that uses them.
+          Use it for quick experiments and check results with `frames`.
+"""
+from __future__ import annotations
+import argparse, math, os, statistics, random, sys, json
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+HERE = Path(__file__).resolve().parent
+PROJECT_ROOT = HERE.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import batch_sim
+from optimizers import OPTIMIZERS, make_optimizer
+from tetris import generators
+from tetris.engine import TetrisEngine
+
+BASE_W = [-0.510066, 0.760666, -0.35663, -0.184483, -0.707105, -0.40666, 0.0, 0.0]  # extended Tetris weights (added two edge-weight features)
+
+Job = Tuple[int, int]           # (genome index, seed)
+CHECKPOINT_VERSION = 2
+
+
+@dataclass
+class TrainConfig:
+    optimizer: str = "ga"       # "ga", "cmaes" or "cem" (see optimizers.py)
+    pop: int = 12
+    elite: int = 3
+    mut_rate: float = 0.6
+    mut_std: float = 0.15
+    games_per_eval: int = 3
+    max_pieces: int = 800
+    generations: int = 10
+    workers: int = field(default_factory=lambda: os.cpu_count() or 1)
+    chunk: int = 0              # games per pool task; 0 = about 4 tasks per worker
+    engine: str = "frames"
+    pieces: str = "random"      # "random", "bag" or a sequence file path
+    crn: bool = True            # same seeds for every genome of a generation
+    fixed_seeds: bool = False   # same seeds for every generation, too
+    pool: bool = True           # shared-memory sequences for worker processes
+    serve: str = ""             # HOST:PORT to serve jobs to TCP workers instead of a pool
+    racing: bool = False        # successive-halving evaluation
+    race_min: int = 2           # games per genome in the first racing round
+    race_z: float = 1.64        # confidence multiplier for dropping a genome
+    seed: int = 0
+    out: str = str(HERE / "best_weights.json")
+    checkpoint: str = str(HERE / "ga_checkpoint.json")     # "" disables checkpoints
+    checkpoint_every: int = 1   # generations between checkpoints
+    resume: str = ""            # checkpoint to continue from
+
+
+class FitnessMemo:
+    """
+    (lines, pieces) per (weights, seed) for one run's engine, piece
+    generator and piece limit; games are deterministic in those, so a hit
+    is exactly what replaying the game would return.
+    """
+
+    def __init__(self) -> None:
+        self.results: Dict[Tuple[Tuple[float, ...], int], Tuple[int, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(weights: Sequence[float], seed: int) -> Tuple[Tuple[float, ...], int]:
+        return tuple(weights), seed
+
+    def to_json(self) -> List[list]:
+        return [[list(w), s, lines, pieces] for (w, s), (lines, pieces) in self.results.items()]
+
+    @classmethod
+    def from_json(cls, rows: Sequence[list]) -> "FitnessMemo":
+        memo = cls()
+        for w, s, lines, pieces in rows:
+            memo.results[cls.key(w, s)] = (lines, pieces)
+        return memo
+
+
+def play_frames(weights: Sequence[float], seed: int, max_pieces: int,
+                generator: Optional[generators.GeneratorFactory] = None) -> Tuple[int, int]:
+    """(lines, pieces) for the live Bot driven frame by frame, as in the GUI."""
+    from player import reach
+    from player.bot import Bot
+    bot = Bot(weights=weights)
+    every = max(1, round(bot.interval_ms / reach.FRAME_MS))
+    env = TetrisEngine(seed=seed, generator=generator)
+    frame = 0
+    while not env.done and env.game.pieces < max_pieces:
+        env.step(bot.decide(env.obs()) if frame % every == 0 else None)
+        frame += 1
+    return env.game.score, env.game.pieces
+
+
+ENGINES = {"place": batch_sim.play_game, "frames": play_frames}
+
+
+def evaluate_weights(weights: List[float], seed: int, max_pieces: int = 800,
+                     engine: str = "frames",
+                     generator: Optional[generators.GeneratorFactory] = None) -> Tuple[int, int]:
+    """(lines_cleared, pieces_played) for one game of `weights` on `seed`."""
+    return ENGINES[engine](weights, seed, max_pieces, generator)
+
+
+def pieces_spec(cfg: TrainConfig) -> tuple:
+    return (cfg.pieces,) if cfg.pieces in ("random", "bag") else ("file", cfg.pieces)
+
+
+def _run_chunk(engine: str, games: List[Tuple[List[float], int]], max_pieces: int,
+               spec: tuple) -> List[Tuple[int, int]]:
+    generator = generators.from_spec(spec)
+    weights = [w for w, _ in games]
+    seeds = [s for _, s in games]
+    if engine == "place":
+        return batch_sim.simulate(weights, seeds, max_pieces, generator)
+    return [evaluate_weights(w, s, max_pieces, engine, generator) for w, s in games]
+
+
+def genome_seeds(cfg: TrainConfig, gen: int, i: int) -> List[int]:
+    base_seed = cfg.seed + 3571 * (1 if cfg.fixed_seeds else gen) + (0 if cfg.crn else 101 * i)
+    return [base_seed + 7919 * k for k in range(cfg.games_per_eval)]
+
+
+def run_jobs(executor: Optional[ProcessPoolExecutor], cfg: TrainConfig,
+             pop: List[List[float]], jobs: List[Job], spec: tuple,
+             memo: Optional[FitnessMemo] = None) -> Dict[Job, Tuple[int, int]]:
+    """
+    Play every (genome, seed) job, chunked over the pool; {job: (lines,
+    pieces)}. Games already in `memo`, or repeated within `jobs`, are
+    played once.
+    """
+    memo = memo if memo is not None else FitnessMemo()
+    results: Dict[Job, Tuple[int, int]] = {}
+    pending: Dict[Tuple[Tuple[float, ...], int], List[Job]] = {}
+    for job in jobs:
+        key = memo.key(pop[job[0]], job[1])
+        if key in memo.results:
+            results[job] = memo.results[key]
+            memo.hits += 1
+        else:
+            pending.setdefault(key, []).append(job)
+    todo = [same[0] for same in pending.values()]
+    memo.misses += len(todo)
+
+    def collect(c: List[Job], out: List[Tuple[int, int]]) -> None:
+        for (i, s), r in zip(c, out):
+            r = tuple(r)
+            key = memo.key(pop[i], s)
+            memo.results[key] = r
+            for job in pending[key]:
+                results[job] = r
+
+    chunk = cfg.chunk or max(1, math.ceil(len(todo) / (4 * cfg.workers)))
+    chunks = [todo[k:k + chunk] for k in range(0, len(todo), chunk)]
+    if executor is None:
+        for c in chunks:
+            collect(c, _run_chunk(cfg.engine, [(pop[i], s) for i, s in c], cfg.max_pieces, spec))
+        return results
+    futures = {executor.submit(_run_chunk, cfg.engine, [(pop[i], s) for i, s in c], cfg.max_pieces, spec): c
+               for c in chunks}
+    for future in as_completed(futures):
+        collect(futures[future], future.result())
+    return results
+
+
+def race(executor: Optional[ProcessPoolExecutor], cfg: TrainConfig, pop: List[List[float]],
+         seeds: List[List[int]], spec: tuple,
+         memo: Optional[FitnessMemo] = None) -> Tuple[Dict[Job, Tuple[int, int]], List[int], List[int]]:
+    """
+    Successive-halving evaluation; returns (results, games played per
+    genome, surviving genome indices).
+    """
+    n = len(pop)
+    results: Dict[Job, Tuple[int, int]] = {}
+    played = [0] * n
+    alive = list(range(n))
+    target = max(1, min(cfg.race_min, cfg.games_per_eval))
+    while True:
+        jobs = [(i, s) for i in alive for s in seeds[i][played[i]:target]]
+        results.update(run_jobs(executor, cfg, pop, jobs, spec, memo))
+        for i in alive:
+            played[i] = target
+        if target >= cfg.games_per_eval or len(alive) <= cfg.elite:
+            break
+        if target >= 2:
+            lines = {i: [results[(i, s)][0] for s in seeds[i][:target]] for i in alive}
+            means = {i: statistics.mean(v) for i, v in lines.items()}
+            se = math.sqrt(statistics.mean(statistics.variance(v) for v in lines.values()) / target)
+            ranked = sorted(alive, key=lambda i: (-means[i], i))
+            cutoff = means[ranked[cfg.elite - 1]] - cfg.race_z * se
+            worse = [i for i in reversed(ranked[cfg.elite:]) if means[i] + cfg.race_z * se < cutoff]
+            dropped = set(worse[:len(alive) // 2])
+            alive = [i for i in alive if i not in dropped]
+        target = min(cfg.games_per_eval, target * 2)
+    return results, played, alive
+
+
+def eval_genome(results: Dict[Job, Tuple[int, int]], i: int, seeds: Sequence[int]) -> Tuple[float, float]:
+    scores, lpps = [], []
+    for s in seeds:
+        lines, pieces = results[(i, s)]
+        scores.append(lines)
+        lpps.append(lines / max(1, pieces))
+    return statistics.mean(scores), statistics.mean(lpps)
+
+
+def smoke_test(engine: str = "frames"):
+    print("Smoke test (using evaluate_weights): baseline one game...", flush=True)
+    lines, pieces = evaluate_weights(BASE_W, seed=0, engine=engine)
+    print(f"  baseline -> lines={lines}, pieces={pieces}, LPP≈{lines/max(1,pieces):.3f}\n", flush=True)
+
+def eval_many(weights, seeds=20, cfg: Optional[TrainConfig] = None):
+    cfg = cfg or TrainConfig()
+    totals, lpps = [], []
+    for k in range(seeds):
+        lines, pieces = evaluate_weights(weights, 100000 + k, cfg.max_pieces, cfg.engine,
+                                         generators.from_spec(pieces_spec(cfg)))
+        totals.append(lines)
+        lpps.append(lines / max(1, pieces))
+    print(
+        f"Final check over {seeds} seeds: "
+        f"avg lines={statistics.mean(totals):.1f} ± {statistics.pstdev(totals):.1f}, "
+        f"avg LPP={statistics.mean(lpps):.3f}",
+        flush=True,
+    )
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """Write `state` as JSON next to `path`, then rename it into place."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        state = json.load(f)
+    if state.get("version") == 1:
+        # Before pluggable optimizers: the GA's next population.
+        state["optimizer"] = {"name": "ga", "state": {"population": state.pop("population")}}
+    elif state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"{path}: unsupported checkpoint version {state.get('version')!r}")
+    return state
+
+
+def train(cfg: Optional[TrainConfig] = None):
+    cfg = cfg or TrainConfig()
+    rng = random.Random(cfg.seed)
+    optimizer = make_optimizer(cfg.optimizer, cfg, BASE_W, rng)
+    best_w = list(BASE_W)
+    best_score = -1e9
+    games_played = games_fixed = 0
+    memo = FitnessMemo()
+    start = 1
+    if cfg.resume:
+        state = load_checkpoint(cfg.resume)
+        version, internal, gauss_next = state["rng"]
+        rng.setstate((version, tuple(internal), gauss_next))
+        optimizer.load(state["optimizer"]["state"])
+        best_w, best_score = state["best_w"], state["best_score"]
+        games_played, games_fixed = state["games_played"], state["games_fixed"]
+        memo = FitnessMemo.from_json(state["memo"])
+        start = state["generation"] + 1
+        print(f"Resuming {cfg.resume} at generation {start} "
+              f"({len(memo.results)} memoized games)", flush=True)
+
+    spec = pieces_spec(cfg)
+    pool = None
+    if cfg.serve:
+        import distributed
+        executor = distributed.Coordinator(*distributed.parse_address(cfg.serve))
+        host, port = executor.address
+        print(f"Serving jobs on {host}:{port}; start workers with "
+              f"`{distributed.TOKEN_ENV}={executor.token} python distributed.py worker "
+              f"--connect {host}:{port}`", flush=True)
+    else:
+        executor = ProcessPoolExecutor(max_workers=cfg.workers) if cfg.workers > 1 else None
+    if isinstance(executor, ProcessPoolExecutor) and cfg.pool:
+        # Every game of the run, generated once; workers attach by name.
+        all_seeds = sorted({s for gen in range(start, cfg.generations + 1)
+                            for i in range(cfg.pop) for s in genome_seeds(cfg, gen, i)})
+        pool = generators.SequencePool.create(generators.from_spec(spec), all_seeds,
+                                              cfg.max_pieces + 2)
+        spec = pool.spec
+    try:
+        for gen in range(start, cfg.generations + 1):
+            print(f"[gen {gen:02d}] evaluating population of {cfg.pop} "
+                  f"({cfg.pop * cfg.games_per_eval} games on "
+                  f"{'TCP workers' if cfg.serve else f'{cfg.workers} workers'})...", flush=True)
+            pop = optimizer.ask(rng)
+            seeds = [genome_seeds(cfg, gen, i) for i in range(cfg.pop)]
+            if cfg.racing:
+                results, played, alive = race(executor, cfg, pop, seeds, spec, memo)
+            else:
+                jobs = [(i, s) for i in range(cfg.pop) for s in seeds[i]]
+                results = run_jobs(executor, cfg, pop, jobs, spec, memo)
+                played, alive = [cfg.games_per_eval] * cfg.pop, list(range(cfg.pop))
+            survivors = set(alive)
+            evals = []
+            gen_lpps = []
+            genomes = []
+            for i, w in enumerate(pop):
+                s, lpp = eval_genome(results, i, seeds[i][:played[i]])
+                print(f"  eval {i+1:02d}/{cfg.pop:02d}: lines={s:.1f}  LPP≈{lpp:.3f}  games={played[i]}"
+                      f"{'' if i in survivors else '  (dropped)'}", flush=True)
+                evals.append((i in survivors, s, w))
+                gen_lpps.append(lpp)
+                genomes.append({"weights": w, "lines": s, "lpp": lpp, "survivor": i in survivors,
+                                "games": [[seed, *results[(i, seed)]] for seed in seeds[i][:played[i]]]})
+            # Survivors first: a genome dropped by the race never becomes an elite.
+            evals = [(s, w) for _, s, w in sorted(evals, reverse=True, key=lambda t: (t[0], t[1]))]
+            fixed = cfg.pop * cfg.games_per_eval
+            games_played += sum(played)
+            games_fixed += fixed
+            if cfg.racing:
+                print(f"[gen {gen:02d}] racing: {sum(played)}/{fixed} games, saved {fixed - sum(played)} "
+                      f"({(fixed - sum(played)) / fixed:.0%}); {len(alive)} survivors", flush=True)
+            if cfg.serve:
+                for line in executor.report():
+                    print(f"[gen {gen:02d}] worker {line}", flush=True)
+            if memo.hits:
+                print(f"[gen {gen:02d}] memo: {memo.hits} games reused, {memo.misses} played so far",
+                      flush=True)
+            scores = [s for s, _ in evals]
+            mean_s = statistics.mean(scores)
+            med_s = statistics.median(scores)
+            best_s = scores[0]
+            p90 = scores[max(0, int(0.1 * len(scores)) - 1)]
+            print(
+                f"[gen {gen:02d}] mean={mean_s:.2f}  med={med_s:.2f}  best={best_s:.2f}  p90={p90:.2f}  "
+                f"LPP≈{statistics.mean(gen_lpps):.3f}",
+                flush=True,
+            )
+            print(f"           best_w = {[round(x, 4) for x in evals[0][1]]}\n", flush=True)
+
+            if best_s > best_score:
+                best_score = best_s
+                best_w = evals[0][1][:]
+
+            optimizer.tell(evals, rng)
+
+            if cfg.checkpoint and (gen % max(1, cfg.checkpoint_every) == 0 or gen == cfg.generations):
+                save_checkpoint(cfg.checkpoint, {
+                    "version": CHECKPOINT_VERSION,
+                    "config": asdict(cfg),
+                    "generation": gen,
+                    "rng": rng.getstate(),
+                    "optimizer": {"name": optimizer.name, "state": optimizer.state()},
+                    "best_w": best_w,
+                    "best_score": best_score,
+                    "games_played": games_played,
+                    "games_fixed": games_fixed,
+                    "evaluations": genomes,
+                    "memo": memo.to_json(),
+                })
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if pool is not None:
+            pool.close()
+
+    with open(cfg.out, "w") as f:
+        json.dump(best_w, f)
+    print("\n=== Training done ===", flush=True)
+    print(f"Best weights saved to {cfg.out}", flush=True)
+    print("Best weights:", [round(x, 6) for x in best_w], flush=True)
+    if cfg.racing:
+        print(f"Racing played {games_played}/{games_fixed} games "
+              f"({(games_fixed - games_played) / max(1, games_fixed):.0%} saved)", flush=True)
+    eval_many(best_w, seeds=20, cfg=cfg)
+    return best_w
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> TrainConfig:
+    d = TrainConfig()
+    ap = argparse.ArgumentParser(description="GA trainer for the bot's feature weights")
+    ap.add_argument("--optimizer", choices=sorted(OPTIMIZERS), default=d.optimizer,
+                    help="weight search: genetic algorithm, CMA-ES or noisy cross-entropy")
+    ap.add_argument("--pop", type=int, default=d.pop)
+    ap.add_argument("--elite", type=int, default=d.elite)
+    ap.add_argument("--mut-rate", type=float, default=d.mut_rate)
+    ap.add_argument("--mut-std", type=float, default=d.mut_std)
+    ap.add_argument("--games-per-eval", type=int, default=d.games_per_eval)
+    ap.add_argument("--max-pieces", type=int, default=d.max_pieces)
+    ap.add_argument("--generations", type=int, default=None,
+                    help=f"generations in the run (default: {d.generations})")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="worker processes (default: core count; 1 runs in-process)")
+    ap.add_argument("--chunk", type=int, default=d.chunk,
+                    help="games per pool task (default: about 4 tasks per worker)")
+    ap.add_argument("--engine", choices=sorted(ENGINES), default=d.engine,
+                    help="frames plays the live bot; place is a faster spawn-drop "
+                         "stand-in whose weights may not transfer")
+    ap.add_argument("--pieces", default=d.pieces,
+                    help='piece generator: "random", "bag" or a sequence file path')
+    ap.add_argument("--no-crn", dest="crn", action="store_false",
+                    help="give every genome its own seeds, as the original trainer did")
+    ap.add_argument("--fixed-seeds", action="store_true",
+                    help="play the same seeds every generation, so carried-over elites are never replayed")
+    ap.add_argument("--no-pool", dest="pool", action="store_false",
+                    help="let workers generate pieces instead of reading a shared-memory pool")
+    ap.add_argument("--serve", default=None, metavar="HOST:PORT",
+                    help="hand games to TCP workers (see distributed.py) instead of a local pool; "
+                         "--workers then only sizes the chunks (default: local pool, or the "
+                         "checkpoint's setting when resuming)")
+    ap.add_argument("--racing", action="store_true",
+                    help="successive-halving evaluation instead of a fixed number of games")
+    ap.add_argument("--race-min", type=int, default=d.race_min)
+    ap.add_argument("--race-z", type=float, default=d.race_z)
+    ap.add_argument("--seed", type=int, default=d.seed)
+    ap.add_argument("--out", default=None, help=f"best weights file (default: {d.out})")
+    ap.add_argument("--checkpoint", default=d.checkpoint,
+                    help='checkpoint file, rewritten during the run ("" disables)')
+    ap.add_argument("--checkpoint-every", type=int, default=d.checkpoint_every)
+    ap.add_argument("--resume", default=d.resume, metavar="CHECKPOINT",
+                    help="continue a run from its checkpoint, with its saved settings")
+    ap.add_argument("--smoke-test", action="store_true")
+    args = ap.parse_args(argv)
+    if args.resume:
+        cfg = TrainConfig(**load_checkpoint(args.resume)["config"])
+        cfg.resume = args.resume
+    else:
+        cfg = TrainConfig(**{k: v for k, v in vars(args).items()
+                             if k in asdict(d) and v is not None})
+    # The only settings a resumed run may change: none alters results.
+    for name in ("generations", "workers", "out", "serve"):
+        if getattr(args, name) is not None:
+            setattr(cfg, name, getattr(args, name))
+    if args.smoke_test:
+        smoke_test(cfg.engine)
+    if cfg.elite < 2 or cfg.elite > cfg.pop:
+        ap.error("--elite must be between 2 and --pop")
+    return cfg
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(line_buffering=True)
+    train(parse_args())
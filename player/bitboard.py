@@ -0,0 +1,152 @@
+"""
+Integer-per-row bitboard shared by `Bot.decide` and the GA trainer.
+
+A board is a list of H ints, one per row with row 0 at the top of the well
+(the same orientation as the list-of-lists grid). Bit c of a row is set when
+column c is occupied, so collision is a mask AND, a full line is a compare
+against `(1 << W) - 1` and transitions are popcounts of XORs.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+from .pieces import Rotation
+
+Board = List[int]
+
+
+def from_grid(grid: Sequence[Sequence[int]], skip=None) -> Board:
+    """Pack a grid into row ints, leaving out any (r, c) cells in `skip`."""
+    board = []
+    for row in grid:
+        bits = 0
+        for c, v in enumerate(row):
+            if v > 0:
+                bits |= 1 << c
+        board.append(bits)
+    if skip:
+        H = len(board)
+        for (r, c) in skip:
+            if 0 <= r < H and c >= 0:
+                board[r] &= ~(1 << c)
+    return board
+
+
+def to_grid(board: Board, W: int) -> List[List[int]]:
+    return [[(row >> c) & 1 for c in range(W)] for row in board]
+
+
+def collides(board: Board, W: int, rot: Rotation, x: int, y: int) -> bool:
+    col = x + rot.jmin
+    if col < 0 or col + rot.span >= W:
+        return True
+    H = len(board)
+    for i, bits in rot.rows:
+        r = y + i
+        if r < 0 or r >= H:
+            return True
+        if board[r] & (bits << col):
+            return True
+    return False
+
+
+def drop_y(board: Board, W: int, rot: Rotation, x: int) -> Optional[int]:
+    """Landing y when dropped from the top of the well, by stepping down."""
+    H = len(board)
+    y = 0
+    while not collides(board, W, rot, x, y + 1):
+        y += 1
+        if y >= H:
+            break
+    if collides(board, W, rot, x, y):
+        return None
+    return y
+
+
+def surface(board: Board, W: int) -> List[int]:
+    """Row index of the topmost filled cell per column (H when empty)."""
+    H = len(board)
+    tops = [H] * W
+    seen = 0
+    for r, row in enumerate(board):
+        new = row & ~seen
+        while new:
+            low = new & -new
+            tops[low.bit_length() - 1] = r
+            new ^= low
+        seen |= row
+    return tops
+
+
+def landing_y(board: Board, W: int, tops: List[int], rot: Rotation, x: int) -> Optional[int]:
+    """
+    Same result as `drop_y`, from the column profiles: the piece rests where
+    the first of its column bottoms meets the surface.
+    """
+    col = x + rot.jmin
+    y = min(tops[col + k] - 1 - b for k, b in enumerate(rot.bottom))
+    if y < 0:
+        # Overlapping the spawn rows; keep drop_y's exact (rare) behaviour.
+        return drop_y(board, W, rot, x)
+    return y
+
+
+def place(board: Board, rot: Rotation, x: int, y: int) -> Board:
+    col = x + rot.jmin
+    out = board[:]
+    H = len(out)
+    for i, bits in rot.rows:
+        r = y + i
+        if 0 <= r < H:
+            out[r] |= bits << col
+    return out
+
+
+def clear_lines(board: Board, W: int) -> Tuple[int, Board]:
+    full = (1 << W) - 1
+    kept = [row for row in board if row != full]
+    cleared = len(board) - len(kept)
+    if cleared:
+        kept = [0] * cleared + kept
+    return cleared, kept
+
+
+def place_and_clear(board: Board, W: int, rot: Rotation, x: int, y: int) -> Tuple[int, Board]:
+    return clear_lines(place(board, rot, x, y), W)
+
+
+def features(board: Board, W: int) -> Tuple[int, ...]:
+    """
+    (aggregate height, holes, bumpiness, max height, row transitions,
+    column transitions, left-weighted height, right-weighted height).
+    """
+    H = len(board)
+    full = (1 << W) - 1
+    walls = (1 << (W + 1)) | 1
+    tr_mask = (1 << (W + 1)) - 1
+    heights = [0] * W
+    seen = 0
+    holes = 0
+    rtr = 0
+    ctr = 0
+    prev = full
+    for r, row in enumerate(board):
+        new = row & ~seen
+        while new:
+            low = new & -new
+            heights[low.bit_length() - 1] = H - r
+            new ^= low
+        holes += (seen & ~row).bit_count()
+        seen |= row
+        p = (row << 1) | walls
+        rtr += ((p ^ (p >> 1)) & tr_mask).bit_count()
+        ctr += (prev ^ row).bit_count()
+        prev = row
+    ctr += (prev ^ full).bit_count()
+
+    agg_h = sum(heights)
+    bump = sum(abs(heights[i] - heights[i + 1]) for i in range(W - 1))
+    max_h = max(heights) if heights else 0
+    left_weighted = sum(i * heights[i] for i in range(W))
+    right_weighted = sum((W - 1 - i) * heights[i] for i in range(W))
+    return (agg_h, holes, bump, max_h, rtr, ctr, left_weighted, right_weighted)
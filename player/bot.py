@@ -19,12 +19,18 @@ IMPORTS YOU MIGHT NEED:
 -----------------------
 """
 from __future__ import annotations
-from typing import Optional, List, Dict, Any
+import os
+import time
+from typing import Optional, List, Dict, Any, Sequence, Tuple
 
 # Add your imports here (numpy, tensorflow, pytorch, etc.)
 # import numpy as np
 # import torch
 # from your_model import YourModel
+from tetris.engine import SPAWN_X, SPAWN_Y, gravity_period
+from . import batch, bitboard, pieces, profiling, reach
+from .cache import FeatureCache
+from .evaluator import IncrementalEvaluator
 
 
 """
@@ -35,288 +41,283 @@ IMPLEMENT YOUR BOT HERE
 
 
 class Bot:
-    def __init__(self) -> None:
-        pass
-
-
-    def decide(self, obs: Optional[dict]) -> Optional[str]:
+    LINES_BONUS = 0.760666
+    CHUNK = 16          # NumPy candidates scored between deadline checks
+
+    def __init__(self, vectorized: bool = False, interval_ms: Optional[float] = None,
+                 lookahead: bool = False, beam: int = 4,
+                 cache: Optional[FeatureCache] = None,
+                 weights: Optional[List[float]] = None) -> None:
+        # Score all candidates in one NumPy pass; falls back to the scalar
+        # incremental evaluator when NumPy is not installed.
+        self.vectorized = vectorized and batch.available()
+        # Two-ply search: the `beam` best placements of the current piece
+        # are re-ranked by the best placement of obs["next_piece"] after them.
+        self.lookahead = lookahead
+        self.beam = max(1, beam)
+        # Optional feature cache for the scalar path, shareable with the
+        # GA agent (see player/cache.py).
+        self.cache = cache
+        if weights is not None:
+            # Injected weights (GA evaluation) instead of weights.json.
+            self._weights = [float(x) for x in weights]
+        if interval_ms is None:
+            try:
+                interval_ms = float(os.getenv("BOT_INTERVAL_MS") or 120)
+            except ValueError:
+                interval_ms = 120.0
+        # How often we get to press a key; bounds the moves per gravity row.
+        self.interval_ms = interval_ms
+        # Plan for the piece in play: the chosen key path and the states
+        # along it, reused until the board or the piece leaves the path.
+        self._plan: Optional[Dict[str, Any]] = None
+        # Search coverage of the last decide() call (see decide).
+        self.last_stats: Dict[str, Any] = {}
+        # (board_version, bitboard) of the last snapshot observation parsed;
+        # reused until the locked board changes.
+        self._parsed: Optional[Tuple[Any, bitboard.Board]] = None
+
+    def _load_weights(self) -> None:
+        import json
+        from pathlib import Path
+        wpath = Path(__file__).with_name("weights.json")
+        with open(wpath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._weights = [float(x) for x in data]
+
+
+    def _scores(self, board: bitboard.Board, W: int, ptype: str,
+                candidates: List[tuple], lines: int = 0,
+                deadline: Optional[float] = None) -> List[float]:
+        """
+        Score of each (rotation, x, y) candidate in order; `lines` already
+        cleared count too. Past `deadline` (perf_counter seconds) only a
+        prefix is returned, never less than the first candidate.
+        """
+        rots = pieces.table(W)[ptype]
+        if self.vectorized:
+            step = len(candidates) if deadline is None else self.CHUNK
+            out: List[float] = []
+            for lo in range(0, len(candidates), step):
+                if out and time.perf_counter() >= deadline:
+                    break
+                placements = [(rots[r_idx], x, y) for r_idx, x, y in candidates[lo:lo + step]]
+                scores = batch.score_placements(board, W, placements, self._weights, self.LINES_BONUS)
+                out += (scores + self.LINES_BONUS * lines).tolist()
+            profiling.count("features.evaluations", len(out))
+            return out
+        evaluator = IncrementalEvaluator(board, W, self.cache)
+        out = []
+        for r_idx, x, y in candidates:
+            if out and deadline is not None and time.perf_counter() >= deadline:
+                break
+            cleared, f = evaluator.evaluate(rots[r_idx], x, y)
+            out.append(sum(w * v for w, v in zip(self._weights, f)) + self.LINES_BONUS * (cleared + lines))
+        profiling.count("features.evaluations", len(out))
+        return out
+
+
+    def _lookahead(self, board: bitboard.Board, W: int, ptype: str, nxt: str,
+                   candidates: List[tuple], scores: Dict[int, float],
+                   moves: int, rows_per_move: int,
+                   deadline: Optional[float] = None) -> Tuple[int, int]:
+        """
+        (index of the candidate whose best follow-up with `nxt` scores
+        highest, beam entries refined). Refines best-first until `deadline`;
+        with no time left at all the best greedy candidate is kept.
+        """
+        rots = pieces.table(W)[ptype]
+        order = sorted(scores, key=lambda k: (-scores[k], k))[:self.beam]
+        best_k, best = order[0], None
+        refined = 0
+        for k in order:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            refined += 1
+            r_idx, x, y = candidates[k]
+            cleared, after = bitboard.place_and_clear(board, W, rots[r_idx], x, y)
+            locks = reach.search(after, W, nxt, (SPAWN_X, SPAWN_Y, 0), moves, rows_per_move,
+                                 deadline)
+            if not locks:
+                continue
+            s = max(self._scores(after, W, nxt, list(locks), cleared, deadline=deadline))
+            if best is None or s > best:
+                best_k, best = k, s
+        return best_k, refined
+
+
+    def decide(self, obs: Optional[dict], deadline_ms: Optional[float] = None) -> Optional[str]:
+        """
+        Key to press for `obs`. With `deadline_ms`, the reachability search
+        and then placement scoring stop when the budget runs out and the
+        best placement found so far is used (a search cut short offers the
+        placements reached so far, dropped straight down); `last_stats`
+        reports how much of the search was covered. The budget is checked
+        between rows and chunks, so a call can overrun it by one of those.
+        """
+        with profiling.timer("decide"):
+            return self._decide(obs, deadline_ms)
+
+
+    def _decide(self, obs: Optional[dict], deadline_ms: Optional[float]) -> Optional[str]:
+        t0 = time.perf_counter()
+        deadline = None if deadline_ms is None else t0 + deadline_ms / 1000
+        key, job = self.prepare(obs, deadline)
+        if job is None:
+            return key
+        with profiling.timer("decide.score"):
+            partial = self._scores(job["board"], job["W"], job["ptype"], job["ordered"],
+                                   deadline=deadline)
+        return self.finish(job, partial, deadline)
+
+
+    def prepare(self, obs: Optional[dict],
+                deadline: Optional[float] = None) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        First half of `decide`: (key, None) when no scoring is needed (plan
+        hit, nothing to place), else (None, job) where `job["ordered"]`
+        are the candidates to score against `job["board"]`, in order. The
+        scores go to `finish`; the decision server batches this step.
+        Past `deadline` the reachability search is cut short (see
+        `reach.search`).
+        """
+        t0 = time.perf_counter()
         if not hasattr(self, "_weights"):
-            import json
-            from pathlib import Path
-            wpath = Path(__file__).with_name("weights.json")
-            with open(wpath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self._weights = [float(x) for x in data]
-
-        LINES_BONUS = 0.760666
+            self._load_weights()
 
         if obs is None:
-            return None
-        grid = obs.get("grid")
+            return None, None
+        # A snapshot ("board", locked cells only) or a full "grid" with the
+        # current piece painted in.
+        grid = obs.get("board")
+        if grid is None:
+            grid = obs.get("grid")
         cur = obs.get("current_piece")
         level = int(obs.get("level", 1) or 1)
         if grid is None or cur is None:
-            return None
+            return None, None
 
         H = len(grid)
         W = len(grid[0]) if H else 0
-        SPEEDY = (level >= 10)
-
-        SHAPES = {
-            "I": [[1, 5, 9, 13], [4, 5, 6, 7]],
-            "Z": [[4, 5, 9, 10], [2, 6, 5, 9]],
-            "S": [[6, 7, 9, 10], [1, 5, 6, 10]],
-            "L": [[1, 2, 5, 9], [0, 4, 5, 6], [1, 5, 9, 8], [4, 5, 6, 10]],
-            "J": [[1, 2, 6, 10], [5, 6, 7, 9], [2, 6, 10, 11], [3, 5, 6, 7]],
-            "T": [[1, 4, 5, 6], [1, 4, 5, 9], [4, 5, 6, 9], [1, 5, 6, 9]],
-            "O": [[1, 2, 5, 6]],
-        }
-
-
-        def clone(b):
-            return [row[:] for row in b]
-
-
-        def remove_current(b, cells):
-            out = clone(b)
-            if cells:
-                for (r, c) in cells:
-                    if 0 <= r < H and 0 <= c < W:
-                        out[r][c] = 0
-            return out
 
+        SHAPES = pieces.table(W)
 
-        def collision(board, mask, x, y):
-            for idx in mask:
-                i, j = divmod(idx, 4)
-                rr, cc = y + i, x + j
-                if rr < 0 or rr >= H or cc < 0 or cc >= W:
-                    return True
-                if board[rr][cc] > 0:
-                    return True
-            return False
-
-
-        def drop_y(board, mask, x):
-            y = 0
-            while not collision(board, mask, x, y + 1):
-                y += 1
-                if y >= H:
-                    break
-            if collision(board, mask, x, y):
-                return None
-            return y
-
-
-        def place_and_clear(board, mask, x, y):
-            b = clone(board)
-            for idx in mask:
-                i, j = divmod(idx, 4)
-                rr, cc = y + i, x + j
-                if 0 <= rr < H and 0 <= cc < W:
-                    b[rr][cc] = 1
-            cleared = 0
-            write = H - 1
-            for r in range(H - 1, -1, -1):
-                if all(b[r][c] > 0 for c in range(W)):
-                    cleared += 1
-                else:
-                    if write != r:
-                        b[write] = b[r][:]
-                    write -= 1
-            for r in range(write, -1, -1):
-                b[r] = [0] * W
-            return cleared, b
-
-
-        def col_heights(board):
-            heights = [0] * W
-            for c in range(W):
-                h = 0
-                for r in range(H):
-                    if board[r][c] > 0:
-                        h = H - r
-                        break
-                heights[c] = h
-            return heights
-
-
-        def count_holes(board, heights):
-            holes = 0
-            for c in range(W):
-                top = H - heights[c]
-                for r in range(top + 1, H):
-                    if board[r][c] == 0:
-                        holes += 1
-            return holes
-
-
-        def row_transitions(board):
-            trans = 0
-            for r in range(H):
-                prev = 1
-                for c in range(W):
-                    curv = 1 if board[r][c] > 0 else 0
-                    if curv != prev:
-                        trans += 1
-                    prev = curv
-                if prev == 0:
-                    trans += 1
-            return trans
-
-
-        def col_transitions(board):
-            trans = 0
-            for c in range(W):
-                prev = 1
-                for r in range(H):
-                    curv = 1 if board[r][c] > 0 else 0
-                    if curv != prev:
-                        trans += 1
-                    prev = curv
-                if prev == 0:
-                    trans += 1
-            return trans
-
-
-        def features(board):
-            heights = col_heights(board)
-            agg_h = sum(heights)
-            holes = count_holes(board, heights)
-            bump = sum(abs(heights[i] - heights[i + 1]) for i in range(W - 1))
-            max_h = max(heights) if heights else 0
-            rtr = row_transitions(board)
-            ctr = col_transitions(board)
-            left_weighted = sum(i * heights[i] for i in range(W))
-            right_weighted = sum((W - 1 - i) * heights[i] for i in range(W))
-            return (agg_h, holes, bump, max_h, rtr, ctr, left_weighted, right_weighted)
-
-
-        def score_board(board, lines_cleared):
-            f = features(board)
-            return sum(w * v for w, v in zip(self._weights, f)) + LINES_BONUS * lines_cleared
-
-
-        def x_bounds(mask):
-            js = [idx % 4 for idx in mask]
-            return -min(js), (W - 1 - max(js))
-
-
-        def can_reach(board: List[List[int]], piece: str,
-                      start_x: int, start_y: int, start_rot: int,
-                      target_rot: int, target_x: int) -> bool:
-            """
-            Simulate control: exactly one action (a/d/w) per tick, then gravity.
-            Success if the piece would LAND with (x==target_x and rot==target_rot).
-            """
-            rotations = SHAPES[piece]
-            x, y, rot = start_x, start_y, start_rot % len(rotations)
-            if collision(board, rotations[rot], x, y):
-                return False
-            MAX_TICKS = H + 16
-
-            ticks = 0
-            while ticks < MAX_TICKS:
-                ticks += 1
-                mask_now = rotations[rot]
-                mask_goal = rotations[target_rot % len(rotations)]
-
-                if x < target_x:
-                    nx = x + 1
-                    if not collision(board, mask_now, nx, y):
-                        x = nx
-                elif x > target_x:
-                    nx = x - 1
-                    if not collision(board, mask_now, nx, y):
-                        x = nx
-                else:
-                    if (rot % len(rotations)) != (target_rot % len(rotations)):
-                        if not collision(board, mask_goal, x, y):
-                            rot = target_rot % len(rotations)
-                        else:
-                            for dx in (+1, -1, +2, -2):
-                                nx = x + dx
-                                if 0 <= nx < W and not collision(board, mask_now, nx, y) and not collision(board, mask_goal, nx, y):
-                                    x = nx
-                                    rot = target_rot % len(rotations)
-                                    break
-
-                if collision(board, rotations[rot], x, y + 1):
-                    return (x == target_x) and (rot % len(rotations) == (target_rot % len(rotations)))
-                y += 1
-            return False
-
-        base_board = remove_current(grid, cur.get("cells"))
+        with profiling.timer("decide.parse"):
+            base_board = self._parse(obs, grid, cur)
         ptype = cur.get("type")
         if ptype not in SHAPES:
-            return None
+            return None, None
 
         cur_x = int(cur.get("x", 0))
         cur_y = int(cur.get("y", 0))
         cur_rot = int(cur.get("rotation", 0))
 
-        best = None
-        for r_idx, mask in enumerate(SHAPES[ptype]):
-            xmin, xmax = x_bounds(mask)
-            for x in range(xmin, xmax + 1):
-                if not can_reach(base_board, ptype, cur_x, cur_y, cur_rot, r_idx, x):
-                    continue
-                y = drop_y(base_board, mask, x)
-                if y is None:
-                    continue
-                cleared, after = place_and_clear(base_board, mask, x, y)
-                s = score_board(after, cleared)
-                if (best is None) or (s > best[0]):
-                    best = (s, r_idx, x, y)
-        if best is None:
-            return " "
-
-        target_rot, target_x = best[1], best[2]
+        moves, rows_per_move = reach.move_budget(gravity_period(level), self.interval_ms)
+        key = (ptype, tuple(base_board), moves, rows_per_move)
+        state = (cur_x, cur_y, cur_rot % len(SHAPES[ptype]))
+        plan = self._plan
+        if plan is not None and plan["key"] == key:
+            i = plan["states"].get(state)
+            if i is not None:
+                profiling.count("decide.plan_hits")
+                self.last_stats = {"planned": False}
+                return reach.next_key(plan["path"][i:]), None
+
+        # Every lock position reachable from where the piece is now, with
+        # the key path to it, under this level's gravity.
+        with profiling.timer("decide.reach"):
+            locks = reach.search(base_board, W, ptype, state, moves, rows_per_move, deadline)
+        candidates = list(locks)
+        profiling.count("decide.searches")
+        profiling.count("candidates", len(candidates))
+        if not candidates:
+            self._plan = None
+            self.last_stats = {"planned": True, "candidates": 0, "scored": 0, "coverage": 1.0}
+            return " ", None
+
+        # Cheapest good candidates first: the deepest landings, which
+        # usually score best, so a cut-off still leaves a sensible choice.
+        order = sorted(range(len(candidates)), key=lambda k: -candidates[k][2])
+        return None, {
+            "t0": t0, "board": base_board, "W": W, "ptype": ptype, "key": key,
+            "state": state, "locks": locks, "candidates": candidates, "order": order,
+            "ordered": [candidates[k] for k in order],
+            "moves": moves, "rows_per_move": rows_per_move,
+            "next": (obs.get("next_piece") or {}).get("type"),
+        }
 
-        cur_x = int(cur.get("x", 0))
-        cur_y = int(cur.get("y", 0))
-        cur_rot = int(cur.get("rotation", 0))
-        mask_now = SHAPES[ptype][cur_rot % len(SHAPES[ptype])]
-        mask_rot = SHAPES[ptype][target_rot % len(SHAPES[ptype])]
-
-        if SPEEDY:
-            dist = abs(target_x - cur_x)
-            rem = 0
-            while not collision(base_board, mask_now, cur_x, cur_y + 1 + rem) and (cur_y + rem) < H:
-                rem += 1
-            if dist > rem + 1:
-                if target_x > cur_x:
-                    target_x = cur_x + min(dist, max(1, rem // 2))
-                else:
-                    target_x = cur_x - min(dist, max(1, rem // 2))
-
-        if (cur_rot % len(SHAPES[ptype])) != (target_rot % len(SHAPES[ptype])):
-            if not collision(base_board, mask_rot, cur_x, cur_y):
-                return "w"
-            dir_right = 1 if target_x > cur_x else -1
-            nx = cur_x + dir_right
-            if 0 <= nx < W and not collision(base_board, mask_now, nx, cur_y):
-                return "d" if dir_right == 1 else "a"
-            nx = cur_x - dir_right
-            if 0 <= nx < W and not collision(base_board, mask_now, nx, cur_y):
-                return "a" if dir_right == 1 else "d"
-            if not SPEEDY and not collision(base_board, mask_now, cur_x, cur_y + 1):
-                return "s"
-            return None
-
-        if cur_x < target_x:
-            nx = cur_x + 1
-            if not collision(base_board, mask_now, nx, cur_y):
-                return "d"
-            if not SPEEDY and not collision(base_board, mask_now, cur_x, cur_y + 1):
-                return "s"
-            return None
-        elif cur_x > target_x:
-            nx = cur_x - 1
-            if not collision(base_board, mask_now, nx, cur_y):
-                return "a"
-            if not SPEEDY and not collision(base_board, mask_now, cur_x, cur_y + 1):
-                return "s"
-            return None
-
-        return " "
+
+    def _parse(self, obs: dict, grid, cur: dict) -> bitboard.Board:
+        version = obs.get("board_version")
+        if "board" not in obs:
+            return bitboard.from_grid(grid, skip=cur.get("cells"))
+        parsed = self._parsed
+        if version is not None and parsed is not None and parsed[0] == version:
+            profiling.count("decide.parse_hits")
+            return parsed[1]
+        board = bitboard.from_grid(grid)
+        self._parsed = (version, board)
+        return board
+
+
+    def finish(self, job: Dict[str, Any], partial: Sequence[float],
+               deadline: Optional[float] = None) -> Optional[str]:
+        """Second half of `decide`: pick from the scores of a `prepare` job and plan the path."""
+        W, ptype, candidates = job["W"], job["ptype"], job["candidates"]
+        SHAPES = pieces.table(W)
+        scores = dict(zip(job["order"], partial))
+        refined = 0
+        nxt = job["next"]
+        if self.lookahead and nxt in SHAPES:
+            with profiling.timer("decide.lookahead"):
+                k, refined = self._lookahead(job["board"], W, ptype, nxt, candidates, scores,
+                                             job["moves"], job["rows_per_move"], deadline)
+            profiling.count("lookahead.refined", refined)
+        else:
+            # First maximum, as the strict `>` scan always picked.
+            k = max(scores, key=lambda c: (scores[c], -c))
+        self.last_stats = {
+            "planned": True,
+            "candidates": len(candidates),
+            "scored": len(scores),
+            "coverage": len(scores) / len(candidates),
+            "refined": refined,
+            "elapsed_ms": (time.perf_counter() - job["t0"]) * 1000,
+            "deadline_hit": deadline is not None and time.perf_counter() >= deadline,
+        }
+
+        with profiling.timer("decide.plan"):
+            path = job["locks"][candidates[k]]
+            states = reach.trace(job["state"], path, len(SHAPES[ptype]))
+            self._plan = {
+                "key": job["key"],
+                "path": path,
+                "trace": states,
+                "states": {s: i for i, s in enumerate(states)},
+            }
+        return reach.next_key(path)
+
+
+    def sequence(self, obs: Optional[dict]) -> Tuple[Tuple[Optional[str], ...], List[Tuple[int, int, int]]]:
+        """
+        The whole plan for the piece in `obs`: (path, states), where path
+        holds the remaining keys with `reach.GRAVITY` for each gravity row
+        and states[i] is the (x, y, rotation) the piece is in before
+        path[i]. Without a plan (nothing reachable) path is just the key
+        `decide` returned.
+        """
+        return self.remaining(obs, self.decide(obs))
+
+
+    def remaining(self, obs: Optional[dict],
+                  key: Optional[str]) -> Tuple[Tuple[Optional[str], ...], List[Tuple[int, int, int]]]:
+        """`sequence` for the `key` a decision on `obs` just returned."""
+        cur = (obs or {}).get("current_piece") or {}
+        plan = self._plan
+        if plan is not None and cur:
+            grid = obs.get("board") or obs["grid"]
+            n = len(pieces.table(len(grid[0]))[cur["type"]])
+            i = plan["states"].get((int(cur["x"]), int(cur["y"]), int(cur["rotation"]) % n))
+            if i is not None:
+                return plan["path"][i:], plan["trace"][i:]
+        return ((key,) if key else ()), []
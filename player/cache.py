@@ -0,0 +1,91 @@
+"""
+Bounded LRU cache of board features, shared by `Bot` and the GA agent.
+
+Keys are exact bitboard digests: all rows of a board packed into one int
+(row r at bits W*r .. W*r + W - 1) with a sentinel bit above the top row. Values are
+`(lines cleared, features)` for the board after its full rows are cleared.
+Values hold no scores, so they stay valid across weight vectors and one
+cache can be shared by every genome of a GA run. A cache serves one board
+geometry (W x H).
+
+`IncrementalEvaluator(board, W, cache=...)` looks candidates up by the
+digest of the base board plus the placed piece, before anything is
+evaluated.
+"""
+from __future__ import annotations
+
+import sys
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .bitboard import Board
+
+Entry = Tuple[int, Tuple[int, ...]]
+
+# Per-entry overhead of the OrderedDict slot and its links, on top of the
+# key and value objects themselves.
+_SLOT_BYTES = 100
+
+
+def digest(board: Board, W: int) -> int:
+    """Exact key for `board`: rows packed W bits apart under a sentinel bit."""
+    d = 1 << (W * len(board))
+    for r, row in enumerate(board):
+        d |= row << (W * r)
+    return d
+
+
+class FeatureCache:
+    def __init__(self, max_entries: Optional[int] = None,
+                 max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[int, Entry]" = OrderedDict()
+        self._capacity: Optional[int] = max_entries
+        self.entry_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: int) -> Optional[Entry]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: int, entry: Entry) -> None:
+        if not self.entry_bytes:
+            # Size the cap from the first entry; all entries of one board
+            # geometry are the same shape.
+            self.entry_bytes = (sys.getsizeof(key) + sys.getsizeof(entry)
+                                + sum(sys.getsizeof(v) for v in entry[1])
+                                + sys.getsizeof(entry[1]) + _SLOT_BYTES)
+            by_bytes = max(1, self.max_bytes // self.entry_bytes)
+            self._capacity = min(self.max_entries or by_bytes, by_bytes)
+        data = self._data
+        data[key] = entry
+        if len(data) > self._capacity:
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "capacity": self._capacity or 0,
+            "approx_bytes": len(self._data) * self.entry_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,128 @@
+"""
+Incremental feature evaluation for candidate placements on one base board.
+
+`IncrementalEvaluator` keeps per-column heights, holes and transitions and
+per-row transitions for the base board. Evaluating a placement only
+recomputes the (at most 4) rows and columns the piece touches; a placement
+that completes a line falls back to `bitboard.features` on the cleared board.
+Results are identical to `bitboard.features(place_and_clear(...))`.
+With a `FeatureCache`, placements are first looked up by board digest.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from . import bitboard
+from .bitboard import Board
+from .cache import FeatureCache, digest
+from .pieces import Rotation
+
+
+def _transitions(bits: int, n: int) -> int:
+    # Sequence wall, bit 0 .. bit n-1, wall: count changes between neighbours.
+    p = (bits << 1) | 1 | (1 << (n + 1))
+    return ((p ^ (p >> 1)) & ((1 << (n + 1)) - 1)).bit_count()
+
+
+class IncrementalEvaluator:
+    def __init__(self, board: Board, W: int, cache: Optional[FeatureCache] = None) -> None:
+        H = len(board)
+        self.board = board
+        self.W = W
+        self.H = H
+        self.full = (1 << W) - 1
+        self.cache = cache
+        self.digest = digest(board, W) if cache is not None else 0
+        # A base board that already holds a full row (the engine never
+        # clears row 0) clears on every placement, so always recompute.
+        self.has_full = self.full in board
+
+        # Column ints with the floor at bit 0, so height is bit_length().
+        cols = [0] * W
+        for r, row in enumerate(board):
+            bit = 1 << (H - 1 - r)
+            while row:
+                low = row & -row
+                cols[low.bit_length() - 1] |= bit
+                row ^= low
+        self.cols = cols
+        self.heights = [c.bit_length() for c in cols]
+        self.col_holes = [h - c.bit_count() for h, c in zip(self.heights, cols)]
+        self.col_tr = [_transitions(c, H) for c in cols]
+        self.row_tr = [_transitions(row, W) for row in board]
+
+        heights = self.heights
+        self.agg_h = sum(heights)
+        self.holes = sum(self.col_holes)
+        self.bump = sum(abs(heights[i] - heights[i + 1]) for i in range(W - 1))
+        self.max_h = max(heights) if heights else 0
+        self.rtr = sum(self.row_tr)
+        self.ctr = sum(self.col_tr)
+        self.left_weighted = sum(i * heights[i] for i in range(W))
+        self.right_weighted = sum((W - 1 - i) * heights[i] for i in range(W))
+
+    def base_features(self) -> Tuple[int, ...]:
+        return (self.agg_h, self.holes, self.bump, self.max_h, self.rtr,
+                self.ctr, self.left_weighted, self.right_weighted)
+
+    def evaluate(self, rot: Rotation, x: int, y: int) -> Tuple[int, Tuple[int, ...]]:
+        """(lines cleared, features) after placing `rot` at (x, y)."""
+        cache = self.cache
+        if cache is None:
+            return self._evaluate(rot, x, y)
+        # The piece only adds cells, so the placed board's digest is the
+        # base digest with the piece bits set.
+        W = self.W
+        key = self.digest
+        col = x + rot.jmin
+        for i, bits in rot.rows:
+            key |= bits << (col + W * (y + i))
+        entry = cache.get(key)
+        if entry is None:
+            entry = self._evaluate(rot, x, y)
+            cache.put(key, entry)
+        return entry
+
+    def _evaluate(self, rot: Rotation, x: int, y: int) -> Tuple[int, Tuple[int, ...]]:
+        board = self.board
+        W, H = self.W, self.H
+        if self.has_full:
+            cleared, after = bitboard.place_and_clear(board, W, rot, x, y)
+            return cleared, bitboard.features(after, W)
+        col = x + rot.jmin
+
+        rtr = self.rtr
+        row_tr = self.row_tr
+        for i, bits in rot.rows:
+            r = y + i
+            new_row = board[r] | (bits << col)
+            if new_row == self.full:
+                cleared, after = bitboard.place_and_clear(board, W, rot, x, y)
+                return cleared, bitboard.features(after, W)
+            rtr += _transitions(new_row, W) - row_tr[r]
+
+        heights: List[int] = self.heights[:]
+        agg_h, holes, ctr = self.agg_h, self.holes, self.ctr
+        max_h = self.max_h
+        lw, rw = self.left_weighted, self.right_weighted
+        shift = H - 4 - y
+        for k, cb in enumerate(rot.colbits):
+            c = col + k
+            new_col = self.cols[c] | (cb << shift if shift >= 0 else cb >> -shift)
+            h = new_col.bit_length()
+            dh = h - heights[c]
+            heights[c] = h
+            agg_h += dh
+            lw += c * dh
+            rw += (W - 1 - c) * dh
+            if h > max_h:
+                max_h = h
+            holes += (h - new_col.bit_count()) - self.col_holes[c]
+            ctr += _transitions(new_col, H) - self.col_tr[c]
+
+        old = self.heights
+        bump = self.bump
+        for p in range(max(0, col - 1), min(W - 1, col + rot.width)):
+            bump += abs(heights[p] - heights[p + 1]) - abs(old[p] - old[p + 1])
+
+        return 0, (agg_h, holes, bump, max_h, rtr, ctr, lw, rw)
@@ -0,0 +1,69 @@
+"""
+Piece/rotation placement tables, built once per board width.
+
+`SHAPES` is the canonical 4x4-index encoding used by the engine and the
+bots. `table(W)[piece][rotation]` is a `Rotation` that carries everything a
+placement search needs without touching the 4x4 masks again.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Dict, NamedTuple, Tuple
+
+SHAPES = {
+    "I": [[1, 5, 9, 13], [4, 5, 6, 7]],
+    "Z": [[4, 5, 9, 10], [2, 6, 5, 9]],
+    "S": [[6, 7, 9, 10], [1, 5, 6, 10]],
+    "L": [[1, 2, 5, 9], [0, 4, 5, 6], [1, 5, 9, 8], [4, 5, 6, 10]],
+    "J": [[1, 2, 6, 10], [5, 6, 7, 9], [2, 6, 10, 11], [3, 5, 6, 7]],
+    "T": [[1, 4, 5, 6], [1, 4, 5, 9], [4, 5, 6, 9], [1, 5, 6, 9]],
+    "O": [[1, 2, 5, 6]],
+}
+PIECE_TYPES = ("I", "Z", "S", "L", "J", "T", "O")
+
+
+class Rotation(NamedTuple):
+    jmin: int                              # leftmost occupied column in the 4x4 box
+    span: int                              # width - 1
+    rows: Tuple[Tuple[int, int], ...]      # (row offset, bits with jmin at bit 0)
+    cells: Tuple[Tuple[int, int], ...]     # (row offset, column offset) in the 4x4 box
+    width: int
+    xmin: int                              # legal piece x range for this board width
+    xmax: int
+    bottom: Tuple[int, ...]                # lowest row offset per occupied column
+    top: Tuple[int, ...]                   # highest row offset per occupied column
+    colbits: Tuple[int, ...]               # per occupied column, bit (3 - row offset)
+
+
+def _rotation(mask, W: int) -> Rotation:
+    cells = tuple(sorted(divmod(idx, 4) for idx in mask))
+    js = [j for _, j in cells]
+    jmin, jmax = min(js), max(js)
+    width = jmax - jmin + 1
+    rows: Dict[int, int] = {}
+    bottom = [-1] * width
+    top = [4] * width
+    colbits = [0] * width
+    for i, j in cells:
+        k = j - jmin
+        rows[i] = rows.get(i, 0) | (1 << k)
+        colbits[k] |= 1 << (3 - i)
+        bottom[k] = max(bottom[k], i)
+        top[k] = min(top[k], i)
+    return Rotation(
+        jmin=jmin,
+        span=width - 1,
+        rows=tuple(sorted(rows.items())),
+        cells=cells,
+        width=width,
+        xmin=-jmin,
+        xmax=W - 1 - jmax,
+        bottom=tuple(bottom),
+        top=tuple(top),
+        colbits=tuple(colbits),
+    )
+
+
+@lru_cache(maxsize=None)
+def table(W: int) -> Dict[str, Tuple[Rotation, ...]]:
+    return {p: tuple(_rotation(m, W) for m in SHAPES[p]) for p in PIECE_TYPES}
@@ -1,44 +1,37 @@
-from typing import Optional
+from collections import deque
+from typing import Any, Dict, List, Optional
 
 try:
     import pygame 
 except Exception: 
     pygame = None 
 
+from tetris import engine
+
+# Spawn-to-lock record of the most recent pieces (see piece_timings).
+PIECE_TIMINGS: "deque[Dict[str, Any]]" = deque(maxlen=1000)
+
 
 class Grid:
     def get_grid(self, tetris_game):
-        grid_copy = [row[:] for row in tetris_game.grid]
-        current_block = None
-        next_block = None
-        if tetris_game.fig:
-            current_block = {
-                "type": tetris_game.fig.type,
-                "x": tetris_game.fig.x,
-                "y": tetris_game.fig.y,
-                "rotation": tetris_game.fig.rotation,
-                "color": tetris_game.fig.color,
-                "cells": [],
-            }
-            for i in range(4):
-                for j in range(4):
-                    if (i * 4 + j) in tetris_game.fig.img():
-                        r = tetris_game.fig.y + i
-                        c = tetris_game.fig.x + j
-                        current_block["cells"].append((r, c))
-                        if 0 <= r < tetris_game.rows and 0 <= c < tetris_game.cols:
-                            grid_copy[r][c] = tetris_game.fig.color
-
-        if tetris_game.next:
-            next_block = {
-                "type": tetris_game.next.type,
-                "rotation": tetris_game.next.rotation,
-                "color": tetris_game.next.color,
-                "cells": [], 
-            }
+        # Full grid with the active piece painted in; `snapshot` avoids the copy.
+        grid_copy = [list(row) for row in tetris_game.locked()]
+        current_block, next_block = engine.piece_info(tetris_game)
+        if current_block:
+            for r, c in current_block["cells"]:
+                if 0 <= r < tetris_game.rows and 0 <= c < tetris_game.cols:
+                    grid_copy[r][c] = current_block["color"]
 
         return grid_copy, current_block, next_block, tetris_game.lvl
 
+    def snapshot(self, tetris_game):
+        """
+        Observation with the locked board and the active piece kept apart:
+        a read-only "board" shared until the next lock and its
+        "board_version" instead of a painted "grid" copy.
+        """
+        return engine.snapshot(tetris_game)
+
 
 def _install_bot_key_injector():
     if pygame is None:
@@ -49,6 +42,8 @@ def _install_bot_key_injector():
 
     try:
         from .bot import Bot
+        from . import profiling, reach
+        from .send_cmd import CommandReader
     except Exception:
         _install_bot_key_injector._installed = True
         return
@@ -66,60 +61,196 @@ def _install_bot_key_injector():
         "d": getattr(pygame, "K_RIGHT", 275),
         " ": getattr(pygame, "K_SPACE", 32),
     }
-    try:
-        bot = Bot()
-    except Exception:
-        _install_bot_key_injector._installed = True
-        return
     import os
     interval_env = os.getenv("BOT_INTERVAL_MS")
     try:
         interval_ms = int(interval_env) if interval_env else 120
     except Exception:
         interval_ms = 120
+    # "event" (default): plan once per piece and press the plan's keys as
+    # fast as dev_main's edge-triggered input takes them, re-planning only
+    # when the piece leaves the plan. "timer": one decide() per
+    # BOT_INTERVAL_MS, each key held for a few frames.
+    event_driven = (os.getenv("BOT_INJECTOR") or "event").lower() != "timer"
+    # A key repeated back to back needs a release frame in between, so plan
+    # for one key every two frames.
+    plan_ms = 2 * reach.FRAME_MS if event_driven else interval_ms
+    try:
+        # BOT_SERVER=HOST:PORT or unix:PATH asks a shared, already warm
+        # decision server (player/server.py) instead of a bot in this process.
+        server = os.getenv("BOT_SERVER")
+        if server:
+            from .server import DecisionClient
+            bot = DecisionClient(server, interval_ms=plan_ms)
+        else:
+            bot = Bot(interval_ms=plan_ms)
+    except Exception:
+        _install_bot_key_injector._installed = True
+        return
+
+    try:
+        profile_log_ms = int(os.getenv("BOT_PROFILE_LOG_MS") or 5000)
+    except Exception:
+        profile_log_ms = 5000
+    profile_json = os.getenv("BOT_PROFILE_JSON")
+    # Keys queued with send_cmd.send_command take priority over the bot.
+    commands = CommandReader()
 
     state = {
         "active_key": None,     
         "pulse_frames": 0,        
-        "last_decide_ms": 0,     
+        "last_decide_ms": -interval_ms,
         "interval_ms": interval_ms,
         "game_instance": None,
+        "last_profile_ms": 0,
+        # Event-driven replay: the plan for piece number `planned`, the
+        # key pressed on the previous frame and whether ' ' was sent.
+        "frame": 0,
+        "planned": None,
+        "path": (),
+        "index": {},
+        "pressed": None,
+        "dropped": False,
+        # Per-piece timing: counters since the current piece spawned.
+        "piece": None,
+        "spawn_frame": 0,
+        "spawn_ms": 0,
+        "piece_keys": 0,
+        "piece_plans": 0,
     }
 
-    def _update_action() -> None:
+    def _report_profile(now) -> None:
+        # Periodic log line (and JSON dump) of the decision-stage profile.
+        if not profiling.ENABLED or profile_log_ms <= 0:
+            return
+        if now - state["last_profile_ms"] < profile_log_ms:
+            return
+        state["last_profile_ms"] = now
+        print(profiling.log_line(), flush=True)
+        if profile_json:
+            try:
+                profiling.dump_json(profile_json)
+            except Exception:
+                pass
+
+    def _now() -> float:
+        # Game time: the game reads the keys once per tick, so timings and
+        # timer-mode decisions follow the simulation, not the wall clock,
+        # and a seeded game replays the same at any loop speed.
+        return state["frame"] * reach.FRAME_MS
+
+    def _obs():
+        if state["game_instance"] is None:
+            return None
         try:
-            now = pygame.time.get_ticks() if pygame.get_init() else 0
+            return Grid().snapshot(state["game_instance"])
+        except:
+            return None
+
+    def _track_piece(now) -> None:
+        # A piece ends when the game's piece count moves on; record how
+        # long it took from spawn and how many keys and plans it needed.
+        game = state["game_instance"]
+        if game is None:
+            return
+        if state["piece"] is not None and game.pieces != state["piece"]:
+            PIECE_TIMINGS.append({
+                "piece": game.pieces,
+                "level": game.lvl,
+                "frames": state["frame"] - state["spawn_frame"],
+                "ms": now - state["spawn_ms"],
+                "keys": state["piece_keys"],
+                "plans": state["piece_plans"],
+            })
+            profiling.count("injector.pieces")
+        if game.pieces != state["piece"]:
+            state["piece"] = game.pieces
+            state["spawn_frame"] = state["frame"]
+            state["spawn_ms"] = now
+            state["piece_keys"] = state["piece_plans"] = 0
+            state["dropped"] = False
+
+    def _press(key) -> None:
+        if key is None or key == state["pressed"]:
+            # Nothing to do, or a repeat: dev_main only sees a key go down,
+            # so release for a frame first.
+            state["active_key"] = None
+            state["pressed"] = None
+            return
+        state["active_key"] = KEYMAP.get(key)
+        state["pressed"] = key
+        state["piece_keys"] += 1
+        profiling.count("injector.keys")
+        if key == " ":
+            state["dropped"] = True
+
+    def _update_event(now) -> None:
+        game = state["game_instance"]
+        if game is None or game.end or game.fig is None:
+            state["active_key"] = state["pressed"] = None
+            return
+        try:
+            key = commands.next_key()
         except Exception:
-            now = 0
+            key = None
+        if key is not None:
+            if key == state["pressed"]:
+                commands.pending.appendleft(key)
+            _press(key)
+            return
+
+        fig = game.fig
+        cur = (fig.x, fig.y, fig.rotation % len(game.rotations[fig.type]))
+        i = state["index"].get(cur) if state["planned"] == game.pieces else None
+        if i is None:
+            # New piece, or the piece left the plan: plan from here.
+            obs = _obs()
+            try:
+                path, states = bot.sequence(obs)
+            except Exception:
+                path, states = (), []
+            state["path"] = path
+            state["index"] = {s: k for k, s in enumerate(states)}
+            state["planned"] = game.pieces if states else None
+            state["piece_plans"] += 1
+            profiling.count("injector.plans")
+            _report_profile(now)
+            i = state["index"].get(cur)
+            key = reach.next_key(path[i:]) if i is not None else (path[0] if path else None)
+        else:
+            key = reach.next_key(state["path"][i:])
+        if key == " " and state["dropped"]:
+            # Already dropped; the piece falls at the next gravity tick.
+            key = None
+        _press(key)
+
+    def _update_action() -> None:
+        now = _now()
         if now - state["last_decide_ms"] < state["interval_ms"]:
             return
         state["last_decide_ms"] = now
         
-        obs = None
-        if state["game_instance"] is not None:
-            try:
-                grid_helper = Grid()
-                grid, current, next_piece, level = grid_helper.get_grid(state["game_instance"])
-                obs = {
-                    "grid": grid,
-                    "current_piece": current,
-                    "next_piece": next_piece,
-                    "level": level
-                }
-            except:
-                pass
+        obs = _obs()
         
         try:
-            action = bot.decide(obs) 
+            action = commands.next_key()
         except Exception:
             action = None
+        if action is None:
+            try:
+                action = bot.decide(obs)
+            except Exception:
+                action = None
+        _report_profile(now)
 
+        state["piece_plans"] += 1
         keycode = KEYMAP.get(action) if isinstance(action, str) else None
         if keycode is None:
             state["active_key"] = None
             state["pulse_frames"] = 0
             return
 
+        state["piece_keys"] += 1
         state["active_key"] = keycode
         if action == " ":
             state["pulse_frames"] = 3
@@ -156,6 +287,12 @@ def _install_bot_key_injector():
             base = original_get_pressed()
         except Exception:
             return original_get_pressed()
+        state["frame"] += 1
+        now = _now()
+        _track_piece(now)
+        if event_driven:
+            _update_event(now)
+            return _KeyStateProxy(base)
         _update_action()
         if state["active_key"] is not None:
             if state["pulse_frames"] > 0:
@@ -174,6 +311,7 @@ def _install_bot_key_injector():
     
     def set_game_instance(game):
         state["game_instance"] = game
+        state["piece"] = state["planned"] = None
     
     return set_game_instance
 
@@ -188,3 +326,9 @@ def update_game_state(game):
         _set_game_fn(game)
 
 
+def piece_timings() -> List[Dict[str, Any]]:
+    """
+    Per-piece timing of recent pieces, oldest first: frames and game-time
+    ms from spawn to lock, keys pressed and plans made, and the level.
+    """
+    return list(PIECE_TIMINGS)
@@ -0,0 +1,90 @@
+"""
+Named counters and timers for the decision pipeline.
+
+Off unless BOT_PROFILE is set (next to BOT_INTERVAL_MS). When off, `count`
+returns at once and `timer` hands back a shared no-op context manager, so
+the hooks left in `Bot.decide` and `reach.search` cost next to nothing.
+
+    BOT_PROFILE=1              enable
+    BOT_PROFILE_LOG_MS=5000    period of the key injector's log line (0: never)
+    BOT_PROFILE_JSON=path      also write `snapshot()` there on every log tick
+
+Timers accumulate total seconds and calls per stage; counters are plain
+integer totals since the last `reset()`.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+ENABLED = _env_flag("BOT_PROFILE")
+counters: Dict[str, int] = {}
+timers: Dict[str, List[float]] = {}     # name -> [total seconds, calls]
+_NULL = nullcontext()
+
+
+def enable(flag: bool = True) -> None:
+    global ENABLED
+    ENABLED = flag
+
+
+def reset() -> None:
+    counters.clear()
+    timers.clear()
+
+
+def count(name: str, n: int = 1) -> None:
+    if ENABLED:
+        counters[name] = counters.get(name, 0) + n
+
+
+class _Timer:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "_Timer":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        t = timers.get(self.name)
+        if t is None:
+            t = timers[self.name] = [0.0, 0]
+        t[0] += time.perf_counter() - self.t0
+        t[1] += 1
+
+
+def timer(name: str):
+    """Context manager timing one pass through stage `name`."""
+    return _Timer(name) if ENABLED else _NULL
+
+
+def snapshot() -> Dict[str, Any]:
+    return {
+        "counters": dict(counters),
+        "timers": {k: {"total_ms": t * 1000, "calls": n, "mean_ms": t * 1000 / n if n else 0.0}
+                   for k, (t, n) in timers.items()},
+    }
+
+
+def dump_json(path: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def log_line() -> str:
+    parts = [f"{k} {t * 1000 / n:.3f}ms x{n}" for k, (t, n) in sorted(timers.items()) if n]
+    parts += [f"{k}={v}" for k, v in sorted(counters.items())]
+    return "bot profile: " + " | ".join(parts)
@@ -0,0 +1,236 @@
+"""
+Single-pass breadth-first reachability for piece placements.
+
+`search` explores (x, y, rotation) states from the current (or spawn)
+position using the engine's controls: `left`/`right`/`rotate` are rejected
+when they collide (no wall kicks) and gravity moves the piece down one row.
+The search is layered by row: within a row the piece may make a limited
+number of moves before gravity acts (`move_budget`), and every state whose
+next gravity step collides is a lock position. One pass yields every
+reachable lock with the key path to it, including tucks and slides under
+overhangs that a greedy move-then-drop simulation misses.
+"""
+from __future__ import annotations
+
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import profiling
+from .bitboard import Board
+from .pieces import table
+
+Lock = Tuple[int, int, int]                 # (rotation, x, y)
+Path = Tuple[Optional[str], ...]            # keys; GRAVITY marks a gravity tick
+GRAVITY = None
+
+FRAME_MS = 1000 / 60
+_CACHE_SIZE = 256
+_cache: "OrderedDict[tuple, Dict[Lock, Path]]" = OrderedDict()
+
+
+def move_budget(gravity_frames: int, interval_ms: float) -> Tuple[int, int]:
+    """
+    (moves per row, rows per move) for a controller that acts once every
+    `interval_ms` while gravity ticks every `gravity_frames` frames.
+    """
+    frames_per_move = max(1.0, interval_ms / FRAME_MS)
+    if gravity_frames >= frames_per_move:
+        return int(gravity_frames // frames_per_move), 1
+    return 1, math.ceil(frames_per_move / gravity_frames)
+
+
+def search(board: Board, W: int, piece: str, start: Tuple[int, int, int],
+           moves_per_row: int = 1, rows_per_move: int = 1,
+           deadline: Optional[float] = None) -> Dict[Lock, Path]:
+    """
+    Every lock position reachable from `start` = (x, y, rotation), mapped
+    to the key path that gets there. Results are memoized per board and
+    start; callers must not mutate them.
+
+    Past `deadline` (perf_counter seconds, checked between states) the
+    search stops and every state reached so far is dropped straight down;
+    such a partial result always holds at least the straight drop from
+    `start` (unless `start` collides) and is not memoized.
+    """
+    key = (tuple(board), W, piece, start, moves_per_row, rows_per_move)
+    hit = _cache.get(key)
+    if hit is not None:
+        _cache.move_to_end(key)
+        profiling.count("reach.memo_hits")
+        return hit
+    profiling.count("reach.searches")
+    locks, complete = _search(board, W, piece, start, moves_per_row, rows_per_move, deadline)
+    if not complete:
+        profiling.count("reach.deadline_hits")
+        return locks
+    _cache[key] = locks
+    if len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+    return locks
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def _search(board: Board, W: int, piece: str, start: Tuple[int, int, int],
+            moves_per_row: int, rows_per_move: int,
+            deadline: Optional[float] = None) -> Tuple[Dict[Lock, Path], bool]:
+    rots = table(W)[piece]
+    n = len(rots)
+    H = len(board)
+    blocked: Dict[Tuple[int, int], int] = {}
+
+    def blocked_cols(y: int, r: int) -> int:
+        mask = blocked.get((r, y))
+        if mask is None:
+            rot = rots[r]
+            # Bit `col` is set when the piece at that column overlaps the
+            # stack (or the floor) with its top-left box row at y.
+            mask = 0
+            for i, bits in rot.rows:
+                rr = y + i
+                if rr >= H:
+                    mask = -1
+                    break
+                row = board[rr]
+                k = 0
+                while bits:
+                    if bits & 1:
+                        mask |= row >> k
+                    bits >>= 1
+                    k += 1
+            blocked[(r, y)] = mask
+        return mask
+
+    def collides(x: int, y: int, r: int) -> bool:
+        rot = rots[r]
+        col = x + rot.jmin
+        if col < 0 or col + rot.span >= W or y < 0:
+            return True
+        return bool((blocked_cols(y, r) >> col) & 1)
+
+    checks = [0]
+    if profiling.ENABLED:
+        _collides = collides
+
+        def collides(x: int, y: int, r: int) -> bool:
+            checks[0] += 1
+            return _collides(x, y, r)
+
+    x0, y0, r0 = start
+    r0 %= n
+    start = (x0, y0, r0)
+    locks: Dict[Lock, Path] = {}
+    if collides(x0, y0, r0):
+        return locks, True
+
+    parent: Dict[Tuple[int, int, int], Optional[Tuple[Tuple[int, int, int], Optional[str]]]] = {start: None}
+    frontier = [start]
+    y = y0
+    complete = True
+    while frontier:
+        if deadline is not None and time.perf_counter() >= deadline:
+            # Out of time: drop what has been reached straight down, all
+            # states of a rotation at once as a bitset of columns.
+            complete = False
+            by_rot: Dict[int, Dict[int, Tuple[int, int, int]]] = {}
+            for s in frontier:
+                by_rot.setdefault(s[2], {})[s[0] + rots[s[2]].jmin] = s
+            for r, cols in by_rot.items():
+                alive = 0
+                for c in cols:
+                    alive |= 1 << c
+                yy = y
+                while alive:
+                    landed = alive & blocked_cols(yy + 1, r)
+                    alive &= ~landed
+                    while landed:
+                        low = landed & -landed
+                        landed ^= low
+                        s = cols[low.bit_length() - 1]
+                        locks.setdefault((r, s[0], yy), _path(parent, s) + (GRAVITY,) * (yy - y))
+                    yy += 1
+            break
+        row_states = list(frontier)
+        if (y - y0) % rows_per_move == 0 and moves_per_row > 0:
+            dist = dict.fromkeys(frontier, 0)
+            queue = deque(frontier)
+            while queue:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                s = queue.popleft()
+                d = dist[s]
+                if d >= moves_per_row:
+                    continue
+                x, _, r = s
+                for k, nx, nr in (("a", x - 1, r), ("d", x + 1, r), ("w", x, (r + 1) % n)):
+                    ns = (nx, y, nr)
+                    if ns in parent or collides(nx, y, nr):
+                        continue
+                    parent[ns] = (s, k)
+                    dist[ns] = d + 1
+                    queue.append(ns)
+                    row_states.append(ns)
+
+        frontier = []
+        for s in row_states:
+            x, _, r = s
+            if collides(x, y + 1, r):
+                locks[(r, x, y)] = _path(parent, s)
+            else:
+                ns = (x, y + 1, r)
+                if ns not in parent:
+                    parent[ns] = (s, GRAVITY)
+                    frontier.append(ns)
+        y += 1
+    if profiling.ENABLED:
+        profiling.count("reach.states", len(parent))
+        profiling.count("reach.collision_checks", checks[0])
+    return locks, complete
+
+
+def _path(parent, state) -> Path:
+    keys = []
+    step = parent[state]
+    while step is not None:
+        state, k = step
+        keys.append(k)
+        step = parent[state]
+    keys.reverse()
+    return tuple(keys)
+
+
+def trace(start: Tuple[int, int, int], path: Sequence[Optional[str]],
+          rotations: int) -> List[Tuple[int, int, int]]:
+    """The (x, y, rotation) states visited along `path`, starting with `start`."""
+    x, y, r = start
+    r %= rotations
+    states = [(x, y, r)]
+    for k in path:
+        if k is GRAVITY:
+            y += 1
+        elif k == "a":
+            x -= 1
+        elif k == "d":
+            x += 1
+        else:
+            r = (r + 1) % rotations
+        states.append((x, y, r))
+    return states
+
+
+def next_key(path: Sequence[Optional[str]]) -> Optional[str]:
+    """
+    The key to press now to follow `path`: the next move, a soft drop ("s")
+    across three or more gravity rows before the next move, nothing while
+    waiting out a shorter gap, and a hard drop once only gravity remains.
+    """
+    for i, k in enumerate(path):
+        if k is not GRAVITY:
+            if i == 0:
+                return k
+            return "s" if i >= 3 else None
+    return " "
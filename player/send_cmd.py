@@ -4,9 +4,16 @@ import os
 import sys
 import json
 import time
+from collections import deque
 from pathlib import Path
+from typing import Deque, List, Optional
 
-DEFAULT_CMD_FILE = Path(__file__).with_name("command_queue.json")
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not on Windows
+    fcntl = None
+
+DEFAULT_CMD_FILE = Path(__file__).with_name("command_queue.log")
 CMD_FILE = Path(os.getenv("BOT_CMD_FILE", str(DEFAULT_CMD_FILE)))
 
 ALIASES = {
@@ -15,32 +22,116 @@ ALIASES = {
 
 VALID_KEYS = {"w", "a", "s", "d", " "}
 
+# A reader that has consumed the whole log truncates it once it is this big.
+MAX_LOG_BYTES = 1 << 20
+
 
-def send_command(key: str) -> bool:
-    """Add a command to the queue file."""
+def send_command(key: str, path: Optional[Path] = None) -> bool:
+    """
+    Append a command to the queue log: one JSON line per command, written
+    with a single O_APPEND write, so concurrent senders never overwrite
+    each other and the cost does not depend on the queue length. The
+    write holds a shared lock on the log so a reader never truncates it
+    under a sender (see `CommandReader`).
+    """
     if key not in VALID_KEYS and key not in ALIASES:
         return False
-    
+
     actual_key = ALIASES.get(key, key)
+    line = json.dumps({"key": actual_key, "timestamp": time.time()}, separators=(",", ":")) + "\n"
     try:
-        if CMD_FILE.exists():
-            with open(CMD_FILE, 'r') as f:
-                queue = json.load(f)
-                if not isinstance(queue, list):
-                    queue = []
-        else:
-            queue = []
-    except:
-        queue = []
-    
-    queue.append({
-        "key": actual_key,
-        "timestamp": time.time()
-    })
-    try:
-        with open(CMD_FILE, 'w') as f:
-            json.dump(queue, f)
-    except Exception as e:
+        fd = os.open(path or CMD_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+    except OSError:
         return False
-    
-    return True
\ No newline at end of file
+
+    return True
+
+
+class CommandReader:
+    """
+    Consumer side of the queue log. `offset` is the byte position after the
+    last complete line read; each `poll` reads only what was appended since,
+    and a line still being written is left for the next poll.
+
+    The log does not grow without bound. A new reader empties it unless
+    `from_start`, so stale commands from an earlier session are neither
+    replayed nor kept. Once the reader has consumed `max_bytes` or more and
+    caught up with the end, it truncates the log again, under an exclusive
+    lock that waits out senders mid-write (where `fcntl` exists; elsewhere
+    only the start-up truncation happens).
+    """
+
+    def __init__(self, path: Optional[Path] = None, from_start: bool = False,
+                 max_bytes: int = MAX_LOG_BYTES) -> None:
+        self.path = Path(path or CMD_FILE)
+        self.offset = 0
+        self.max_bytes = max_bytes
+        self.pending: Deque[str] = deque()
+        if not from_start:
+            try:
+                os.truncate(self.path, 0)
+            except OSError:
+                pass
+
+    def poll(self) -> List[str]:
+        """Keys appended since the last poll, in order."""
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return []
+        if size < self.offset:
+            # The log was truncated or replaced: start over.
+            self.offset = 0
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        if self.offset == size and self.offset >= self.max_bytes:
+            self._truncate()
+        keys = []
+        for line in data[:end].splitlines():
+            try:
+                key = json.loads(line).get("key")
+            except (ValueError, AttributeError):
+                continue
+            if key in VALID_KEYS:
+                keys.append(key)
+        return keys
+
+    def _truncate(self) -> None:
+        """Empty the log if nothing was appended past `offset` meanwhile."""
+        if fcntl is None:
+            return
+        try:
+            fd = os.open(self.path, os.O_WRONLY)
+        except OSError:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size == self.offset:
+                os.ftruncate(fd, 0)
+                self.offset = 0
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def next_key(self) -> Optional[str]:
+        """Oldest unconsumed key, or None when the queue is empty."""
+        if not self.pending:
+            self.pending.extend(self.poll())
+        return self.pending.popleft() if self.pending else None
+
+
+if __name__ == "__main__":
+    ok = all(send_command(k) for k in sys.argv[1:])
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,341 @@
+"""
+Shared decision server: one process keeps the bot warm (weights loaded,
+reach memo and piece tables built) and answers `decide` requests from many
+games over a local TCP or Unix socket.
+
+    python -m player.server --listen unix:/tmp/tetris-bot.sock
+    BOT_SERVER=unix:/tmp/tetris-bot.sock python main.py
+
+Messages are JSON objects, one per line. A request carries a game id and an
+observation, `{"id": n, "game": g, "obs": {...}, "interval_ms": 120}`; the
+reply is `{"id": n, "key": k}`. With `"sequence": true` the reply also
+carries the rest of the plan as `Bot.sequence` returns it, `"path"` (null
+for a gravity row) and `"states"`. `{"type": "stats"}` returns the latency
+and batch statistics. Each game gets its own `Bot` (its plan follows one
+piece), all sharing the server's weights.
+
+Requests arriving within `window_ms` of each other, or while the previous
+batch is being decided, form one batch: every game that needs a new plan
+is searched, then all their candidates are scored in a single NumPy pass
+(`batch.score_many`). Without NumPy each game is scored on its own.
+`DecisionClient` is the blocking client the key injector uses in place of
+an in-process `Bot`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from . import batch, pieces
+from .bot import Bot
+
+MAX_GAMES = 1024
+_LATENCY_SAMPLES = 100_000
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """("unix", path) for "unix:PATH", else ("tcp", (host, port)) for "HOST:PORT"."""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class DecisionServer:
+    def __init__(self, window_ms: float = 2.0, max_batch: int = 64,
+                 lookahead: bool = False, beam: int = 4) -> None:
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.lookahead = lookahead
+        self.beam = beam
+        template = Bot()
+        template._load_weights()
+        self.weights = template._weights
+        self.bots: "OrderedDict[Tuple[str, float], Bot]" = OrderedDict()
+        self.latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self.batch_sizes: Deque[int] = deque(maxlen=_LATENCY_SAMPLES)
+        self.planned: Deque[int] = deque(maxlen=_LATENCY_SAMPLES)
+        self.requests = 0
+        # One thread decides batches so the event loop keeps reading requests.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher_task: Optional[asyncio.Task] = None
+
+    def _bot(self, game: str, interval_ms: Optional[float]) -> Bot:
+        key = (game, interval_ms)
+        bot = self.bots.get(key)
+        if bot is None:
+            bot = self.bots[key] = Bot(vectorized=True, interval_ms=interval_ms,
+                                       lookahead=self.lookahead, beam=self.beam,
+                                       weights=self.weights)
+            if len(self.bots) > MAX_GAMES:
+                self.bots.popitem(last=False)
+        else:
+            self.bots.move_to_end(key)
+        return bot
+
+    def decide_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replies for a batch of requests, scoring every new plan in one pass."""
+        keys: List[Optional[str]] = [None] * len(requests)
+        bots = []
+        jobs = []
+        for n, req in enumerate(requests):
+            bot = self._bot(str(req.get("game")), req.get("interval_ms"))
+            bots.append(bot)
+            keys[n], job = bot.prepare(req.get("obs"))
+            if job is not None:
+                jobs.append((n, bot, job))
+        if batch.available():
+            groups: Dict[Tuple[int, int], list] = {}
+            for item in jobs:
+                job = item[2]
+                groups.setdefault((job["W"], len(job["board"])), []).append(item)
+            for (W, _), items in groups.items():
+                shapes = pieces.table(W)
+                scores = batch.score_many(
+                    [(job["board"], [(shapes[job["ptype"]][r], x, y) for r, x, y in job["ordered"]])
+                     for _, _, job in items],
+                    W, self.weights, Bot.LINES_BONUS)
+                for (n, bot, job), s in zip(items, scores):
+                    keys[n] = bot.finish(job, s.tolist())
+        else:
+            for n, bot, job in jobs:
+                keys[n] = bot.finish(job, bot._scores(job["board"], job["W"], job["ptype"],
+                                                      job["ordered"]))
+        self.batch_sizes.append(len(requests))
+        self.planned.append(len(jobs))
+        replies = []
+        for req, bot, key in zip(requests, bots, keys):
+            reply: Dict[str, Any] = {"key": key}
+            if req.get("sequence"):
+                reply["path"], reply["states"] = bot.remaining(req.get("obs"), key)
+            replies.append(reply)
+        return replies
+
+    def stats(self) -> Dict[str, Any]:
+        lat = list(self.latencies)
+        sizes = self.batch_sizes
+        return {
+            "requests": self.requests,
+            "games": len(self.bots),
+            "latency_ms": {
+                "mean": sum(lat) / len(lat) if lat else 0.0,
+                "p50": _percentile(lat, 0.50),
+                "p95": _percentile(lat, 0.95),
+                "p99": _percentile(lat, 0.99),
+                "max": max(lat, default=0.0),
+            },
+            "batches": {
+                "count": len(sizes),
+                "mean_size": sum(sizes) / len(sizes) if sizes else 0.0,
+                "max_size": max(sizes, default=0),
+                "mean_planned": sum(self.planned) / len(self.planned) if self.planned else 0.0,
+            },
+        }
+
+    async def _batcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            items = [await queue.get()]
+            end = loop.time() + self.window
+            while len(items) < self.max_batch:
+                try:
+                    items.append(queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                left = end - loop.time()
+                if left <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(queue.get(), left))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                replies = await loop.run_in_executor(self._executor, self.decide_batch,
+                                                     [req for req, _ in items])
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), reply in zip(items, replies):
+                # Done already when the client went away mid-batch.
+                if not future.done():
+                    future.set_result(reply)
+
+    async def _request(self, req: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        t0 = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((req, future))
+        try:
+            reply = {"id": req.get("id"), **(await future)}
+        except Exception as e:
+            reply = {"id": req.get("id"), "key": None, "error": f"{type(e).__name__}: {e}"}
+        self.requests += 1
+        self.latencies.append((time.perf_counter() - t0) * 1000)
+        writer.write((json.dumps(reply) + "\n").encode())
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                req = json.loads(line)
+                if req.get("type") == "stats":
+                    writer.write((json.dumps({"id": req.get("id"), "stats": self.stats()}) + "\n").encode())
+                    await writer.drain()
+                    continue
+                task = asyncio.create_task(self._request(req, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def start(self, address: str) -> asyncio.AbstractServer:
+        self._queue = asyncio.Queue()
+        self._batcher_task = asyncio.create_task(self._batcher())
+        kind, where = parse_address(address)
+        if kind == "unix":
+            if os.path.exists(where):
+                os.unlink(where)
+            return await asyncio.start_unix_server(self._handle, path=where)
+        return await asyncio.start_server(self._handle, *where)
+
+    async def close(self) -> None:
+        """Stop the batcher started by `start` and its decision thread."""
+        task, self._batcher_task = self._batcher_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+
+class DecisionClient:
+    """
+    Blocking stand-in for `Bot` backed by a `DecisionServer`: `decide(obs)`
+    sends the observation and waits for the key, `sequence(obs)` for the
+    whole plan. Connects on first use and
+    again after a dropped connection; errors reach the caller.
+    """
+
+    def __init__(self, address: str, game: Optional[str] = None,
+                 interval_ms: Optional[float] = None, timeout: float = 5.0) -> None:
+        self.address = address
+        self.game = game or f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self.interval_ms = interval_ms
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._lines = None
+        self._ids = 0
+
+    def _connect(self) -> None:
+        kind, where = parse_address(self.address)
+        if kind == "unix":
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(where)
+        else:
+            sock = socket.create_connection(where, timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._lines = sock.makefile("r", encoding="utf-8")
+
+    def _call(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        if self._sock is None:
+            self._connect()
+        self._ids += 1
+        msg["id"] = self._ids
+        try:
+            self._sock.sendall((json.dumps(msg) + "\n").encode())
+            while True:
+                line = self._lines.readline()
+                if not line:
+                    raise ConnectionError("decision server closed the connection")
+                reply = json.loads(line)
+                if reply.get("id") == self._ids:
+                    return reply
+        except (OSError, ValueError):
+            self.close()
+            raise
+
+    def _decide(self, obs: Optional[dict], **extra: Any) -> Dict[str, Any]:
+        reply = self._call({"game": self.game, "obs": obs, "interval_ms": self.interval_ms, **extra})
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    def decide(self, obs: Optional[dict], deadline_ms: Optional[float] = None) -> Optional[str]:
+        return self._decide(obs)["key"]
+
+    def sequence(self, obs: Optional[dict]) -> Tuple[Tuple[Optional[str], ...], List[Tuple[int, int, int]]]:
+        reply = self._decide(obs, sequence=True)
+        return tuple(reply["path"]), [tuple(s) for s in reply["states"]]
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call({"type": "stats"})["stats"]
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._lines = None
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = DecisionServer(args.window_ms, args.max_batch, args.lookahead, args.beam)
+    srv = await server.start(args.listen)
+    print(f"decision server listening on {args.listen}", flush=True)
+    try:
+        async with srv:
+            while True:
+                await asyncio.sleep(args.stats_every or 3600)
+                if args.stats_every:
+                    print(json.dumps(server.stats()), flush=True)
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Shared Tetris bot decision server")
+    ap.add_argument("--listen", default="127.0.0.1:7777", help='"HOST:PORT" or "unix:PATH"')
+    ap.add_argument("--window-ms", type=float, default=2.0,
+                    help="how long a batch waits for more requests")
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--lookahead", action="store_true")
+    ap.add_argument("--beam", type=int, default=4)
+    ap.add_argument("--stats-every", type=float, default=0,
+                    help="print latency and batch stats every N seconds")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
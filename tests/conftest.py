@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+for path in (Path(__file__).resolve().parent, PROJECT_ROOT, PROJECT_ROOT / "modeltraining"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,142 @@
+"""
+The list-of-lists board code the bitboard replaced, kept as it was (lifted
+out of `Bot.decide` and `agent_heuristic`) as the oracle the
+equivalence tests compare against. A board is H rows of W ints, row 0 at
+the top; a piece mask is a list of 4x4 box indices.
+"""
+from __future__ import annotations
+
+from typing import List, Tuple
+
+SHAPES = {
+    "I": [[1, 5, 9, 13], [4, 5, 6, 7]],
+    "Z": [[4, 5, 9, 10], [2, 6, 5, 9]],
+    "S": [[6, 7, 9, 10], [1, 5, 6, 10]],
+    "L": [[1, 2, 5, 9], [0, 4, 5, 6], [1, 5, 9, 8], [4, 5, 6, 10]],
+    "J": [[1, 2, 6, 10], [5, 6, 7, 9], [2, 6, 10, 11], [3, 5, 6, 7]],
+    "T": [[1, 4, 5, 6], [1, 4, 5, 9], [4, 5, 6, 9], [1, 5, 6, 9]],
+    "O": [[1, 2, 5, 6]],
+}
+
+Grid = List[List[int]]
+
+
+def collision(board: Grid, mask, x: int, y: int) -> bool:
+    H, W = len(board), len(board[0])
+    for idx in mask:
+        i, j = divmod(idx, 4)
+        rr, cc = y + i, x + j
+        if rr < 0 or rr >= H or cc < 0 or cc >= W:
+            return True
+        if board[rr][cc] > 0:
+            return True
+    return False
+
+
+def drop_y(board: Grid, mask, x: int):
+    H = len(board)
+    y = 0
+    while not collision(board, mask, x, y + 1):
+        y += 1
+        if y >= H:
+            break
+    if collision(board, mask, x, y):
+        return None
+    return y
+
+
+def x_bounds(mask, W: int) -> Tuple[int, int]:
+    js = [idx % 4 for idx in mask]
+    return -min(js), (W - 1 - max(js))
+
+
+def place_and_clear(board: Grid, mask, x: int, y: int) -> Tuple[int, Grid]:
+    H, W = len(board), len(board[0])
+    b = [row[:] for row in board]
+    for idx in mask:
+        i, j = divmod(idx, 4)
+        rr, cc = y + i, x + j
+        if 0 <= rr < H and 0 <= cc < W:
+            b[rr][cc] = 1
+    cleared = 0
+    write = H - 1
+    for r in range(H - 1, -1, -1):
+        if all(b[r][c] > 0 for c in range(W)):
+            cleared += 1
+        else:
+            if write != r:
+                b[write] = b[r][:]
+            write -= 1
+    for r in range(write, -1, -1):
+        b[r] = [0] * W
+    return cleared, b
+
+
+def features(board: Grid) -> Tuple[int, ...]:
+    H, W = len(board), len(board[0])
+    heights = [0] * W
+    for c in range(W):
+        for r in range(H):
+            if board[r][c] > 0:
+                heights[c] = H - r
+                break
+    holes = 0
+    for c in range(W):
+        for r in range(H - heights[c] + 1, H):
+            if board[r][c] == 0:
+                holes += 1
+    rtr = 0
+    for r in range(H):
+        prev = 1
+        for c in range(W):
+            curv = 1 if board[r][c] > 0 else 0
+            if curv != prev:
+                rtr += 1
+            prev = curv
+        if prev == 0:
+            rtr += 1
+    ctr = 0
+    for c in range(W):
+        prev = 1
+        for r in range(H):
+            curv = 1 if board[r][c] > 0 else 0
+            if curv != prev:
+                ctr += 1
+            prev = curv
+        if prev == 0:
+            ctr += 1
+    return (sum(heights), holes,
+            sum(abs(heights[i] - heights[i + 1]) for i in range(W - 1)),
+            max(heights) if heights else 0, rtr, ctr,
+            sum(i * heights[i] for i in range(W)),
+            sum((W - 1 - i) * heights[i] for i in range(W)))
+
+
+def score_board(board: Grid, lines_cleared: int, weights, lines_bonus: float) -> float:
+    f = features(board)
+    return sum(w * v for w, v in zip(weights, f)) + lines_bonus * lines_cleared
+
+
+def score_placement(board: Grid, piece: str, rotation: int, x: int, y: int,
+                    weights, lines_bonus: float) -> float:
+    cleared, after = place_and_clear(board, SHAPES[piece][rotation], x, y)
+    return score_board(after, cleared, weights, lines_bonus)
+
+
+def heuristic_choice(board: Grid, piece: str, weights, lines_bonus: float,
+                     reachable) -> Tuple[int, int]:
+    """`HeuristicAgent.choose_action` on lists; `reachable` filters (rotation, x)."""
+    W = len(board[0])
+    best = None
+    for r_idx, mask in enumerate(SHAPES[piece]):
+        xmin, xmax = x_bounds(mask, W)
+        for x in range(xmin, xmax + 1):
+            y = drop_y(board, mask, x)
+            if y is None or not reachable(board, piece, r_idx, x):
+                continue
+            s = score_placement(board, piece, r_idx, x, y, weights[:6], lines_bonus)
+            if best is None or s > best[0]:
+                best = (s, r_idx, x)
+    if best is None:
+        return (0, max(0, min(W - 4, W // 2 - 2)))
+    return best[1], best[2]
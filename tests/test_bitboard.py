@@ -0,0 +1,103 @@
+"""
+The bitboard scorer against the list-of-lists code it replaced
+(tests/list_reference.py), on boards from seeded `TetrisEngine` games.
+"""
+import random
+
+import pytest
+
+import agent_heuristic
+import list_reference as ref
+from player import batch, bitboard, pieces, reach
+from player.bot import Bot
+from tetris.engine import COLS, SPAWN_X, SPAWN_Y, TetrisEngine, gravity_period
+
+SEEDS = range(4)
+VECTORIZED = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not batch.available(), reason="NumPy not installed"))]
+
+
+def positions(seed, pieces_per_game=40):
+    """The engine before each piece of a seeded game of random placements."""
+    env = TetrisEngine(seed=seed)
+    rng = random.Random(seed)
+    while not env.done and env.game.pieces < pieces_per_game:
+        yield env
+        env.step_place(rng.randrange(4), rng.randrange(-1, env.cols))
+
+
+def locked_grid(env):
+    return [row[:] for row in env.game.grid]
+
+
+def reach_locks(bot, obs, board):
+    """The lock positions `bot.decide(obs)` chooses from, with their paths."""
+    cur = obs["current_piece"]
+    moves, rows_per_move = reach.move_budget(gravity_period(obs["level"]), bot.interval_ms)
+    start = (cur["x"], cur["y"], cur["rotation"] % len(ref.SHAPES[cur["type"]]))
+    return reach.search(board, COLS, cur["type"], start, moves, rows_per_move)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_features_match(seed):
+    for env in positions(seed):
+        grid = locked_grid(env)
+        board = bitboard.from_grid(grid)
+        assert bitboard.features(board, COLS) == ref.features(grid)
+        obs = env.obs()
+        assert bitboard.from_grid(obs["grid"], skip=obs["current_piece"]["cells"]) == board
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_place_and_clear_match(seed):
+    rots = pieces.table(COLS)
+    for env in positions(seed, 15):
+        grid = locked_grid(env)
+        board = bitboard.from_grid(grid)
+        for ptype, masks in ref.SHAPES.items():
+            for r_idx, mask in enumerate(masks):
+                xmin, xmax = ref.x_bounds(mask, COLS)
+                for x in range(xmin, xmax + 1):
+                    y = ref.drop_y(grid, mask, x)
+                    assert bitboard.drop_y(board, COLS, rots[ptype][r_idx], x) == y
+                    if y is None:
+                        continue
+                    cleared, after = ref.place_and_clear(grid, mask, x, y)
+                    assert bitboard.place_and_clear(board, COLS, rots[ptype][r_idx], x, y) \
+                        == (cleared, bitboard.from_grid(after))
+
+
+@pytest.mark.parametrize("vectorized", VECTORIZED)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_decide_scores_and_choice_match(seed, vectorized):
+    bot = Bot(vectorized=vectorized)
+    for env in positions(seed):
+        obs = env.obs()
+        grid = locked_grid(env)
+        board = bitboard.from_grid(grid)
+        ptype = obs["current_piece"]["type"]
+        bot._plan = None
+        bot.decide(obs)
+        locks = reach_locks(bot, obs, board)
+        candidates = list(locks)
+        expected = [ref.score_placement(grid, ptype, r_idx, x, y, bot._weights, Bot.LINES_BONUS)
+                    for r_idx, x, y in candidates]
+        assert bot._scores(board, COLS, ptype, candidates) == pytest.approx(expected)
+        chosen = next(c for c in candidates if locks[c] == bot._plan["path"])
+        assert expected[candidates.index(chosen)] == pytest.approx(max(expected))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_heuristic_agent_choice_matches(seed):
+    agent = agent_heuristic.HeuristicAgent()
+    for env in positions(seed):
+        grid = locked_grid(env)
+        board = bitboard.from_grid(grid)
+        ptype = env.game.fig.type
+        env_like = type("EnvLike", (), {"board": grid, "piece": ptype})()
+        # Reachability moved to the spawn search on purpose; the list
+        # scorer is run over the same reachable set.
+        locks = reach.search(board, COLS, ptype, (SPAWN_X, SPAWN_Y, 0))
+        reachable = lambda g, p, r_idx, x: (r_idx, x, ref.drop_y(g, ref.SHAPES[p][r_idx], x)) in locks
+        assert agent.choose_action(env_like) == ref.heuristic_choice(
+            grid, ptype, agent.w, agent_heuristic.LINES_BONUS, reachable)
@@ -0,0 +1,141 @@
+"""`Coordinator` on localhost with real worker processes."""
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+import train_gui_ga
+from distributed import Coordinator, _proof
+
+SCRIPT = Path(train_gui_ga.__file__).with_name("distributed.py")
+SPEC = train_gui_ga.pieces_spec(train_gui_ga.TrainConfig())
+TOKEN = "test-token"
+
+
+def chunk(engine, seeds, max_pieces):
+    return (engine, [(list(train_gui_ga.BASE_W), s) for s in seeds], max_pieces, SPEC)
+
+
+@pytest.fixture
+def coordinator():
+    coord = Coordinator("127.0.0.1", 0, timeout=5.0, token=TOKEN)
+    workers = []
+
+    def start_worker(name):
+        host, port = coord.address
+        proc = subprocess.Popen([sys.executable, str(SCRIPT), "worker", "--connect", f"{host}:{port}",
+                                 "--name", name, "--token", TOKEN, "--retry", "5"],
+                                stdout=subprocess.DEVNULL)
+        workers.append(proc)
+        wait_for(lambda: name in coord.stats)
+        return proc
+
+    yield coord, start_worker
+    coord.shutdown()
+    for proc in workers:
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def wait_for(cond, timeout=30.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.02)
+
+
+def test_two_workers_match_local(coordinator):
+    coord, start_worker = coordinator
+    start_worker("a")
+    start_worker("b")
+    args = [chunk("place", [s, s + 100], 200) for s in range(6)]
+    futures = [coord.submit(train_gui_ga._run_chunk, *a) for a in args]
+    results = [f.result(60) for f in futures]
+    assert results == [[list(r) for r in train_gui_ga._run_chunk(*a)] for a in args]
+    assert coord.stats["a"].jobs + coord.stats["b"].jobs == len(args)
+
+
+def test_killed_worker_job_is_requeued(coordinator):
+    coord, start_worker = coordinator
+    doomed = start_worker("doomed")
+    # Long enough that the worker is still playing it when killed.
+    slow = chunk("frames", [1, 2, 3, 4], 200)
+    future = coord.submit(train_gui_ga._run_chunk, *slow)
+    wait_for(coord.jobs.empty)
+    start_worker("spare")
+    doomed.kill()
+    assert future.result(120) == [list(r) for r in train_gui_ga._run_chunk(*slow)]
+    assert coord.stats["doomed"].requeued == 1
+    assert not coord.stats["doomed"].alive
+    assert coord.stats["spare"].jobs == 1
+
+
+def test_unknown_job_rejected(coordinator):
+    coord, _ = coordinator
+    with pytest.raises(ValueError):
+        coord.submit(print, "hi")
+
+
+def test_wrong_token_refused(coordinator):
+    coord, _ = coordinator
+    host, port = coord.address
+    proc = subprocess.run([sys.executable, str(SCRIPT), "worker", "--connect", f"{host}:{port}",
+                           "--name", "intruder", "--token", "wrong"],
+                          capture_output=True, text=True, timeout=60)
+    assert proc.returncode != 0 and "PermissionError" in proc.stderr
+    assert "intruder" not in coord.stats
+
+
+def fake_worker(coord, name, hello=None):
+    """A socket past the handshake (or one that sent `hello` instead), with its reader."""
+    sock = socket.create_connection(coord.address, timeout=10)
+    lines = sock.makefile("r", encoding="utf-8")
+    challenge = json.loads(lines.readline())
+    if hello is None:
+        hello = {"type": "hello", "name": name, "nonce": "n",
+                 "proof": _proof(TOKEN, "worker", challenge["nonce"])}
+    sock.sendall((json.dumps(hello) + "\n").encode())
+    return sock, lines
+
+
+def test_handshake_not_an_object(coordinator):
+    coord, _ = coordinator
+    sock, lines = fake_worker(coord, "odd", hello=["hello"])
+    with sock:
+        assert lines.readline() == ""
+    assert coord.stats == {}
+
+
+@pytest.mark.parametrize("reply", [lambda job_id: [job_id], lambda job_id: "result"])
+def test_garbled_reply_requeues_job(coordinator, reply):
+    coord, start_worker = coordinator
+    sock, lines = fake_worker(coord, "garbled")
+    wait_for(lambda: "garbled" in coord.stats)
+    args = chunk("place", [5], 100)
+    future = coord.submit(train_gui_ga._run_chunk, *args)
+    with sock:
+        lines.readline()                                    # welcome
+        job = json.loads(lines.readline())
+        sock.sendall((json.dumps(reply(job["id"])) + "\n").encode())
+        start_worker("spare")
+        assert future.result(60) == [list(r) for r in train_gui_ga._run_chunk(*args)]
+    assert coord.stats["garbled"].requeued == 1
+
+
+def test_reply_without_type_fails_the_job(coordinator):
+    coord, _ = coordinator
+    sock, lines = fake_worker(coord, "untyped")
+    wait_for(lambda: "untyped" in coord.stats)
+    future = coord.submit(train_gui_ga._run_chunk, *chunk("place", [5], 100))
+    with sock:
+        lines.readline()
+        job = json.loads(lines.readline())
+        sock.sendall((json.dumps({"id": job["id"]}) + "\n").encode())
+        with pytest.raises(RuntimeError):
+            future.result(30)
@@ -0,0 +1,87 @@
+"""`DecisionServer` on a Unix socket against the in-process `Bot`."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from player import reach
+from player.bot import Bot
+from player.server import DecisionClient, DecisionServer
+from tetris.engine import TetrisEngine
+
+INTERVAL_MS = 120.0
+
+
+@pytest.fixture
+def address(tmp_path):
+    address = f"unix:{tmp_path}/bot.sock"
+    server = DecisionServer()
+    ready = threading.Event()
+    stop = {}
+
+    async def run():
+        srv = await server.start(address)
+        stop["event"] = asyncio.Event()
+        stop["loop"] = asyncio.get_running_loop()
+        ready.set()
+        try:
+            async with srv:
+                await stop["event"].wait()
+        finally:
+            await server.close()
+
+    thread = threading.Thread(target=asyncio.run, args=(run(),))
+    thread.start()
+    assert ready.wait(30)
+    yield address
+    stop["loop"].call_soon_threadsafe(stop["event"].set)
+    thread.join(30)
+    assert not thread.is_alive()
+
+
+def play(bot, seed, max_pieces=25):
+    """Keys and plans `bot` produces over a frame-stepped seeded game."""
+    every = max(1, round(INTERVAL_MS / reach.FRAME_MS))
+    env = TetrisEngine(seed=seed)
+    out = []
+    frame = 0
+    while not env.done and env.game.pieces < max_pieces:
+        action = None
+        if frame % every == 0:
+            obs = env.obs()
+            action = bot.decide(obs)
+            out.append(action)
+            if frame % (4 * every) == 0:
+                out.append(bot.sequence(obs))
+        env.step(action)
+        frame += 1
+    return out
+
+
+def remote(address, seed):
+    client = DecisionClient(address, game=f"test-{seed}", interval_ms=INTERVAL_MS)
+    try:
+        return play(client, seed)
+    finally:
+        client.close()
+
+
+def test_concurrent_clients_match_in_process_bot(address):
+    seeds = [3, 4]
+    with ThreadPoolExecutor(len(seeds)) as pool:
+        served = list(pool.map(lambda s: remote(address, s), seeds))
+    for seed, got in zip(seeds, served):
+        expected = play(Bot(vectorized=True, interval_ms=INTERVAL_MS), seed)
+        expected = [(tuple(x[0]), list(x[1])) if isinstance(x, tuple) else x for x in expected]
+        assert got == expected
+
+
+def test_stats(address):
+    client = DecisionClient(address, interval_ms=INTERVAL_MS)
+    try:
+        client.decide(TetrisEngine(seed=0).obs())
+        stats = client.stats()
+    finally:
+        client.close()
+    assert stats["requests"] == 1 and stats["games"] == 1
@@ -0,0 +1,333 @@
+"""
+Headless Tetris rules engine.
+
+Pure Python, no pygame: `tetris.tetris` renders on top of this module, while
+evaluation and training jobs drive `TetrisEngine` directly without a display
+or frame clock.
+"""
+from __future__ import annotations
+
+import itertools
+import random
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from player.pieces import SHAPES, PIECE_TYPES, table
+
+ROWS = 19
+COLS = 15
+SPAWN_X, SPAWN_Y = 5, 0
+
+# Board versions are unique within a process, across games and resets, so
+# a cache keyed on one never mistakes another game's board for its own.
+_versions = itertools.count(1)
+
+
+class shape:
+    version = SHAPES
+    shapes = list(PIECE_TYPES)
+
+    def __init__(self, x, y, rng=random, piece=None):
+        self.x = x
+        self.y = y
+        if piece is None:
+            self.type = rng.choice(self.shapes)
+            self.color = rng.randint(1, 4)
+        else:
+            self.type, self.color = piece
+        self.shape = self.version[self.type]
+        self.rotation = 0
+
+    def img(self):
+        return self.shape[self.rotation]
+
+    def rotate(self):
+        self.rotation = (self.rotation + 1) % len(self.shape)
+
+
+class tetris:
+    def __init__(self, rows, cols, rng=None, generator=None):
+        self.grid = [[0 for _ in range(cols)] for _ in range(rows)]
+        self.current_shape = None
+        self.rows = rows
+        self.cols = cols
+        self.rotations = table(cols)
+        self.rng = rng if rng is not None else random
+        # Optional piece source (see tetris.generators); overrides rng.
+        self.generator = generator
+        self.lvl = 1
+        self.next = None
+        self.end = False
+        self.score = 0
+        self.pieces = 0
+        # Bumped whenever the locked cells change (see `locked`).
+        self.board_version = next(_versions)
+        self._locked = None
+        self.new_shape()
+
+    def _draw(self):
+        piece = self.generator() if self.generator is not None else None
+        return shape(SPAWN_X, SPAWN_Y, self.rng, piece)
+
+    def new_shape(self):
+        if not self.next:
+            self.next = self._draw()
+        self.fig = self.next
+        self.next = self._draw()
+
+    def collision(self) -> bool:
+        fig = self.fig
+        if not fig:
+            return False
+        for i, j in self.rotations[fig.type][fig.rotation].cells:
+            block_row = i + fig.y
+            block_col = j + fig.x
+            if (
+                block_row >= self.rows
+                or block_row < 0
+                or block_col < 0
+                or block_col >= self.cols
+            ):
+                return True
+            if self.grid[block_row][block_col] > 0:
+                return True
+        return False
+
+    def remove_row(self):
+        rerun = False
+        for i in range(self.rows - 1, 0, -1):
+            completed = True
+            for j in range(0, self.cols):
+                if self.grid[i][j] == 0:
+                    completed = False
+
+            if completed:
+                del self.grid[i]
+                self.grid.insert(0, [0 for i in range(self.cols)])
+                self.score += 1
+
+                if self.score % 5 == 0:
+                    self.lvl += 1
+                rerun = True
+
+        if rerun:
+            self.remove_row()
+
+    def freeze(self):
+        fig = self.fig
+        for i, j in self.rotations[fig.type][fig.rotation].cells:
+            self.grid[fig.y + i][fig.x + j] = fig.color
+
+        self.pieces += 1
+        self.remove_row()
+        self.board_version = next(_versions)
+        self.new_shape()
+        if self.collision():
+            self.end = True
+
+    def locked(self) -> Tuple[Tuple[int, ...], ...]:
+        """Read-only copy of the locked cells, rebuilt only when `board_version` changes."""
+        if self._locked is None or self._locked[0] != self.board_version:
+            self._locked = (self.board_version, tuple(map(tuple, self.grid)))
+        return self._locked[1]
+
+    def move(self):
+        self.fig.y += 1
+        if self.collision():
+            self.fig.y -= 1
+            self.freeze()
+
+    def left(self):
+        self.fig.x -= 1
+        if self.collision():
+            self.fig.x += 1
+
+    def right(self):
+        self.fig.x += 1
+        if self.collision():
+            self.fig.x -= 1
+
+    def freefall(self):
+        while not self.collision():
+            self.fig.y += 1
+        self.fig.y -= 1
+        self.freeze()
+
+    def fast_drop(self):
+        for _ in range(3):
+            self.fig.y += 1
+            if self.collision():
+                self.fig.y -= 1
+                break
+
+    def rotate(self):
+        old_rotation = self.fig.rotation
+        self.fig.rotate()
+        if self.collision():
+            self.fig.rotation = old_rotation
+
+
+def gravity_interval(lvl: int) -> float:
+    """Frames between gravity ticks, as computed by the original GUI loop."""
+    return 15 // lvl * 1.5
+
+
+def gravity_period(lvl: int) -> int:
+    """Whole frames between gravity ticks: `cnt % interval` only hits 0 on integers."""
+    interval = gravity_interval(lvl)
+    if interval == 0:
+        return 1
+    return int(interval) if interval == int(interval) else int(interval * 2)
+
+
+@dataclass
+class StepResult:
+    lines_cleared: int
+    score: int
+    done: bool
+    piece_index: int
+
+
+class TetrisEngine:
+    """
+    Frame-accurate game driver with a reset/step API.
+
+    `step(action)` advances exactly one frame of the GUI loop: the
+    (edge-triggered) action is applied first, then the frame counter and
+    gravity run. `step_place(rotation, x)` is the fast path used by
+    training: rotate and slide at the current height, then hard-drop.
+
+    `generator` is a factory `seed -> piece source` from `tetris.generators`
+    (e.g. `BagPieces`); by default pieces come from `random.Random(seed)`.
+    """
+
+    ACTIONS = ("a", "d", "s", "w", " ")
+
+    def __init__(self, rows: int = ROWS, cols: int = COLS,
+                 seed: Optional[int] = None, game_cls=tetris,
+                 generator: Optional[Callable] = None) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.game_cls = game_cls
+        self.generator = generator
+        self.reset(seed)
+
+    def reset(self, seed: Optional[int] = None) -> dict:
+        self.rng = random.Random(seed)
+        pieces = self.generator(seed) if self.generator is not None else None
+        self.game = self.game_cls(self.rows, self.cols, rng=self.rng, generator=pieces)
+        self.cnt = 0
+        self.space_press = False
+        return self.obs()
+
+    @property
+    def done(self) -> bool:
+        return self.game.end
+
+    def _result(self, score_before: int) -> StepResult:
+        game = self.game
+        return StepResult(game.score - score_before, game.score, game.end, game.pieces)
+
+    def step(self, action: Optional[str] = None) -> StepResult:
+        game = self.game
+        score_before = game.score
+        if not game.end:
+            if action == "a":
+                game.left()
+            elif action == "d":
+                game.right()
+            elif action == "s":
+                game.fast_drop()
+            elif action == "w":
+                game.rotate()
+            elif action == " ":
+                self.space_press = True
+
+        self.cnt += 1
+        if self.cnt >= 1000:
+            self.cnt = 0
+
+        # Past level 15 the GUI formula reaches zero and the original loop
+        # raised ZeroDivisionError; treat that as gravity on every frame.
+        interval = gravity_interval(game.lvl)
+        if interval == 0 or (self.cnt % interval) == 0:
+            if not game.end:
+                if self.space_press:
+                    game.freefall()
+                    self.space_press = False
+                else:
+                    game.move()
+        return self._result(score_before)
+
+    def step_place(self, rotation: int, x: int) -> StepResult:
+        game = self.game
+        score_before = game.score
+        if game.end:
+            return self._result(score_before)
+        fig = game.fig
+        for _ in range((rotation - fig.rotation) % len(fig.shape)):
+            game.rotate()
+        while fig.x != x:
+            before = fig.x
+            if fig.x < x:
+                game.right()
+            else:
+                game.left()
+            if fig.x == before:
+                break
+        game.freefall()
+        self.space_press = False
+        return self._result(score_before)
+
+    def snapshot(self) -> dict:
+        """Copy-free observation of the current game, see `snapshot`."""
+        return snapshot(self.game)
+
+    def obs(self) -> dict:
+        """Observation in the same shape `player.player.Grid.get_grid` produces."""
+        game = self.game
+        grid = [row[:] for row in game.grid]
+        current, nxt = piece_info(game)
+        if current:
+            for r, c in current["cells"]:
+                if 0 <= r < game.rows and 0 <= c < game.cols:
+                    grid[r][c] = current["color"]
+        return {"grid": grid, "current_piece": current, "next_piece": nxt, "level": game.lvl}
+
+
+def piece_info(game) -> Tuple[Optional[dict], Optional[dict]]:
+    """(current_piece, next_piece) observation dicts of `game`."""
+    current = None
+    nxt = None
+    if game.fig:
+        fig = game.fig
+        current = {
+            "type": fig.type,
+            "x": fig.x,
+            "y": fig.y,
+            "rotation": fig.rotation,
+            "color": fig.color,
+            "cells": [(fig.y + i, fig.x + j)
+                      for i, j in game.rotations[fig.type][fig.rotation].cells],
+        }
+    if game.next:
+        nxt = {
+            "type": game.next.type,
+            "rotation": game.next.rotation,
+            "color": game.next.color,
+            "cells": [],
+        }
+    return current, nxt
+
+
+def snapshot(game) -> dict:
+    """
+    Observation that keeps the locked board and the active piece apart:
+    "board" is the read-only `game.locked()` view (no piece painted in,
+    shared until the next lock) and "board_version" changes exactly when
+    it does, so callers can key caches on it. Otherwise as `obs`, minus
+    "grid".
+    """
+    current, nxt = piece_info(game)
+    return {"board": game.locked(), "board_version": game.board_version,
+            "current_piece": current, "next_piece": nxt, "level": game.lvl}
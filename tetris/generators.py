@@ -0,0 +1,179 @@
+"""
+Injectable piece sources for the engine.
+
+A piece source is a callable returning the next `(type, color)` pair, and
+a generator factory builds one from a seed. Pass the factory to
+`TetrisEngine(generator=...)`; without one the engine keeps drawing from its
+own `random.Random(seed)`, exactly as `RandomPieces` does.
+
+    RandomPieces    uniform draws, the engine's default sequence for a seed
+    BagPieces       7-bag: every run of seven pieces is a permutation
+    SequencePieces  a fixed list, e.g. loaded from a sequence file
+    SequencePool    pre-generated sequences in shared memory, so worker
+                    processes replay the same pieces without regenerating
+                    or pickling them
+
+Sequence files hold one sequence per line as whitespace-separated tokens,
+one per piece: the type letter followed by its color, e.g. ``T2 I1 O4``.
+A game with seed s plays line s modulo the number of lines.
+"""
+from __future__ import annotations
+
+import random
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from player.pieces import PIECE_TYPES
+
+Piece = Tuple[str, int]
+PieceSource = Callable[[], Piece]
+GeneratorFactory = Callable[[Optional[int]], PieceSource]
+
+
+class RandomPieces:
+    """Same draws as the engine's default: type, then color, per piece."""
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.rng = random.Random(seed)
+
+    def __call__(self) -> Piece:
+        return self.rng.choice(PIECE_TYPES), self.rng.randint(1, 4)
+
+
+class BagPieces:
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.rng = random.Random(seed)
+        self.bag: List[str] = []
+
+    def __call__(self) -> Piece:
+        if not self.bag:
+            self.bag = list(PIECE_TYPES)
+            self.rng.shuffle(self.bag)
+        return self.bag.pop(), self.rng.randint(1, 4)
+
+
+class SequencePieces:
+    """Replays `pieces` in order, wrapping around at the end."""
+
+    def __init__(self, pieces: Sequence[Piece]) -> None:
+        if not pieces:
+            raise ValueError("empty piece sequence")
+        self.pieces = pieces
+        self.i = 0
+
+    def __call__(self) -> Piece:
+        piece = self.pieces[self.i % len(self.pieces)]
+        self.i += 1
+        return piece
+
+
+def read_sequences(path: str) -> List[List[Piece]]:
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            seq = []
+            for tok in line.split():
+                if tok[0] not in PIECE_TYPES:
+                    raise ValueError(f"{path}: unknown piece {tok!r}")
+                seq.append((tok[0], int(tok[1:] or 1)))
+            if seq:
+                out.append(seq)
+    if not out:
+        raise ValueError(f"{path}: no piece sequences")
+    return out
+
+
+def write_sequences(path: str, sequences: Sequence[Sequence[Piece]]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for seq in sequences:
+            f.write(" ".join(f"{t}{c}" for t, c in seq) + "\n")
+
+
+def sequence_file(path: str) -> GeneratorFactory:
+    sequences = read_sequences(path)
+    return lambda seed: SequencePieces(sequences[(seed or 0) % len(sequences)])
+
+
+def generate(factory: GeneratorFactory, seed: Optional[int], length: int) -> List[Piece]:
+    source = factory(seed)
+    return [source() for _ in range(length)]
+
+
+class _PackedSequence:
+    """Read-only piece view over one row of a `SequencePool` buffer."""
+
+    def __init__(self, buf) -> None:
+        self.buf = buf
+
+    def __len__(self) -> int:
+        return len(self.buf)
+
+    def __getitem__(self, i: int) -> Piece:
+        b = self.buf[i]
+        return PIECE_TYPES[b & 7], (b >> 3) + 1
+
+
+class SequencePool:
+    """
+    One pre-generated sequence per seed, packed one byte per piece (type
+    index in bits 0-2, color - 1 in bits 3-4) in a shared memory block.
+    The parent `create`s and finally `unlink`s it; workers `attach` by name.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, seeds: Sequence[int],
+                 length: int, owner: bool) -> None:
+        self.shm = shm
+        self.seeds = list(seeds)
+        self.length = length
+        self.owner = owner
+        self.row = {s: k for k, s in enumerate(self.seeds)}
+
+    @classmethod
+    def create(cls, factory: GeneratorFactory, seeds: Sequence[int], length: int) -> "SequencePool":
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(seeds) * length))
+        for k, seed in enumerate(seeds):
+            packed = bytes(PIECE_TYPES.index(t) | (c - 1) << 3
+                           for t, c in generate(factory, seed, length))
+            shm.buf[k * length:(k + 1) * length] = packed
+        return cls(shm, seeds, length, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, seeds: Sequence[int], length: int) -> "SequencePool":
+        return cls(shared_memory.SharedMemory(name=name), seeds, length, owner=False)
+
+    @property
+    def spec(self) -> tuple:
+        """Picklable description for `from_spec` in a worker process."""
+        return ("pool", self.shm.name, tuple(self.seeds), self.length)
+
+    def __call__(self, seed: Optional[int]) -> PieceSource:
+        k = self.row[seed]
+        return SequencePieces(_PackedSequence(self.shm.buf[k * self.length:(k + 1) * self.length]))
+
+    def close(self) -> None:
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+_KINDS: Dict[str, GeneratorFactory] = {"random": RandomPieces, "bag": BagPieces}
+_attached: Dict[str, SequencePool] = {}
+
+
+def from_spec(spec: tuple) -> GeneratorFactory:
+    """
+    Factory for a picklable spec: ("random",), ("bag",), ("file", path) or
+    a `SequencePool.spec`. Pools are attached once per process.
+    """
+    kind = spec[0]
+    if kind in _KINDS:
+        return _KINDS[kind]
+    if kind == "file":
+        return sequence_file(spec[1])
+    if kind == "pool":
+        _, name, seeds, length = spec
+        pool = _attached.get(name)
+        if pool is None:
+            pool = _attached[name] = SequencePool.attach(name, seeds, length)
+        return pool
+    raise ValueError(f"unknown piece generator {kind!r}")
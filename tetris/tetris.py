@@ -1,8 +1,10 @@
+import argparse
+import hashlib
 import pygame
-import random
-import sys
 import os
-from player.player import Grid
+import time
+from tetris import engine
+from tetris.engine import TetrisEngine
 
 pygame.init()
 
@@ -35,256 +37,281 @@ font = pygame.font.SysFont("verdana", 50)
 font_2 = pygame.font.SysFont("verdana", 15)
 
 
-class shape:
-    version = {
-        "I": [[1, 5, 9, 13], [4, 5, 6, 7]],
-        "Z": [[4, 5, 9, 10], [2, 6, 5, 9]],
-        "S": [[6, 7, 9, 10], [1, 5, 6, 10]],
-        "L": [[1, 2, 5, 9], [0, 4, 5, 6], [1, 5, 9, 8], [4, 5, 6, 10]],
-        "J": [[1, 2, 6, 10], [5, 6, 7, 9], [2, 6, 10, 11], [3, 5, 6, 7]],
-        "T": [[1, 4, 5, 6], [1, 4, 5, 9], [4, 5, 6, 9], [1, 5, 6, 9]],
-        "O": [[1, 2, 5, 6]],
-    }
-    shapes = ["I", "Z", "S", "L", "J", "T", "O"]
-
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.type = random.choice(self.shapes)
-        self.shape = self.version[self.type]
-        self.color = random.randint(1, 4)
-        self.rotation = 0
-
-    def img(self):
-        return self.shape[self.rotation]
-
-    def rotate(self):
-        self.rotation = (self.rotation + 1) % len(self.shape)
-
-
-class tetris:
-    def __init__(self, rows, cols):
-        self.grid = [[0 for _ in range(cols)] for _ in range(rows)]
-        self.current_shape = None
-        self.rows = rows
-        self.cols = cols
-        self.lvl = 1
-        self.next = None
-        self.end = False
-        self.score = 0
-        self.new_shape()
+def draw_grid_lines(surface, n_rows=rows, n_cols=cols):
+    for i in range(n_rows + 1):
+        pygame.draw.line(surface, grid_color, (0, cell * i), (width, cell * i))
+    for i in range(n_cols + 1):
+        pygame.draw.line(
+            surface, grid_color, (cell * i, 0), (cell * i, height - 120)
+        )
 
+
+class tetris(engine.tetris):
     def make_grid(self):
-        for i in range(self.rows + 1):
-            pygame.draw.line(screen, grid_color, (0, cell * i), (width, cell * i))
-        for i in range(self.cols + 1):
-            pygame.draw.line(
-                screen, grid_color, (cell * i, 0), (cell * i, height - 120)
-            )
-
-    def new_shape(self):
-        if not self.next:
-            self.next = shape(5, 0)
-        self.fig = self.next
-        self.next = shape(5, 0)
-
-    def collision(self) -> bool:
-        if not self.fig:
-            return False
-        for i in range(4):
-            for j in range(4):
-                if (i * 4 + j) in self.fig.img():
-                    block_row = i + self.fig.y
-                    block_col = j + self.fig.x
-                    if (
-                        block_row >= self.rows
-                        or block_row < 0
-                        or block_col < 0
-                        or block_col >= self.cols
-                    ):
-                        return True
-                    if block_row >= 0 and self.grid[block_row][block_col] > 0:
-                        return True
-        return False
-
-    def remove_row(self):
-        rerun = False
-        for i in range(self.rows - 1, 0, -1):
-            completed = True
-            for j in range(0, self.cols):
-                if self.grid[i][j] == 0:
-                    completed = False
-
-            if completed:
-                del self.grid[i]
-                self.grid.insert(0, [0 for i in range(self.cols)])
-                self.score += 1
-
-                if self.score % 5 == 0:
-                    self.lvl += 1
-                rerun = True
-
-        if rerun:
-            self.remove_row()
-
-    def freeze(self):
-        for i in range(4):
-            for j in range(4):
-                if (i * 4 + j) in self.fig.img():
-                    self.grid[self.fig.y + i][self.fig.x + j] = self.fig.color
-
-        self.remove_row()
-        self.new_shape()
-        if self.collision():
-            self.end = True
-
-    def move(self):
-        self.fig.y += 1
-        if self.collision():
-            self.fig.y -= 1
-            self.freeze()
-
-    def left(self):
-        self.fig.x -= 1
-        if self.collision():
-            self.fig.x += 1
-
-    def right(self):
-        self.fig.x += 1
-        if self.collision():
-            self.fig.x -= 1
-
-    def freefall(self):
-        while not self.collision():
-            self.fig.y += 1
-        self.fig.y -= 1
-        self.freeze()
-
-    def fast_drop(self):
-        for _ in range(3):
-            self.fig.y += 1
-            if self.collision():
-                self.fig.y -= 1
-                break
+        draw_grid_lines(screen, self.rows, self.cols)
 
-    def rotate(self):
-        old_rotation = self.fig.rotation
-        self.fig.rotate()
-        if self.collision():
-            self.fig.rotation = old_rotation
-            
-    def end_game(self):
+    def end_game(self, surface=None):
+        if surface is None:
+            surface = screen
         popup = pygame.Rect(50, 140, width - 100, height - 350)
-        pygame.draw.rect(screen, black, popup)
-        pygame.draw.rect(screen, lose, popup, 2)
+        pygame.draw.rect(surface, black, popup)
+        pygame.draw.rect(surface, lose, popup, 2)
 
         game_over = font_2.render("GAME OVER!", True, white)
         option1 = font_2.render("Press r to restart", True, lose)
         option2 = font_2.render("Press q to quit", True, lose)
 
-        screen.blit(game_over, (popup.centerx - game_over.get_width() / 2, popup.y + 20))
-        screen.blit(option1, (popup.centerx - option1.get_width() / 2, popup.y + 60))
-        screen.blit(option2, (popup.centerx - option2.get_width() / 2, popup.y + 100))
-
-def dev_main():
+        surface.blit(game_over, (popup.centerx - game_over.get_width() / 2, popup.y + 20))
+        surface.blit(option1, (popup.centerx - option1.get_width() / 2, popup.y + 60))
+        surface.blit(option2, (popup.centerx - option2.get_width() / 2, popup.y + 100))
+
+
+class Renderer:
+    """
+    Draws the game the way the original full-redraw loop did, but only
+    repaints what changed. The background with its grid lines is rendered
+    once; each board cell is a cached 20x20 tile (empty, locked or active
+    piece, per colour) and only cells whose tile changed since the last
+    frame are blitted and pushed with `display.update(rects)`. The bottom
+    panel (next piece, score, level) is redrawn when its content changes.
+    Tiles are keyed by (locked colour, piece colour), 0 for none.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.background = pygame.Surface(surface.get_size()).convert()
+        self.background.fill(bg_color)
+        draw_grid_lines(self.background)
+        self.panel = pygame.Rect(0, rows * cell, width, height - rows * cell)
+        self.tiles = {}
+        self.game = None
+        self.cells = {}
+        self.locked = (None, {})
+        self.panel_key = None
+        self.ended = False
+        self.rects = []
+
+    def tile(self, key):
+        tile = self.tiles.get(key)
+        if tile is None:
+            locked, piece = key
+            tile = self.background.subsurface((0, 0, cell, cell)).copy()
+            if locked:
+                tile.blit(assets[locked], (0, 0))
+                pygame.draw.rect(tile, white, (0, 0, cell, cell), 1)
+            if piece:
+                img = pygame.transform.scale(assets[piece], (cell - 2, cell - 2))
+                tile.blit(img, (1, 1))
+            self.tiles[key] = tile
+        return tile
+
+    def _locked_cells(self, game):
+        # Rebuilt only when a piece locks (see engine.tetris.board_version).
+        if self.locked[0] != game.board_version:
+            self.locked = (game.board_version, {
+                (r, c): (v, 0)
+                for r, row in enumerate(game.grid) for c, v in enumerate(row) if v > 0
+            })
+        return self.locked[1]
+
+    def _board(self, game):
+        locked = self._locked_cells(game)
+        cells = dict(locked)
+        if game.fig:
+            fig = game.fig
+            for i, j in game.rotations[fig.type][fig.rotation].cells:
+                r, c = fig.y + i, fig.x + j
+                if 0 <= r < rows and 0 <= c < cols:
+                    cells[(r, c)] = (locked.get((r, c), (0, 0))[0], fig.color)
+        return cells
+
+    def _draw_panel(self, game):
+        surface = self.surface
+        surface.blit(self.background, self.panel, self.panel)
+        if game.next:
+            img = assets[game.next.color]
+            for i, j in game.rotations[game.next.type][game.next.rotation].cells:
+                x = (game.next.x + j - 4) * cell
+                y = (game.next.y + i) * cell + height - 100
+                surface.blit(img, (x, y))
+        score_txt = font.render(f"{game.score}", True, white)
+        lvl_txt = font_2.render(f"Level: {game.lvl}", True, white)
+        surface.blit(score_txt, (250 - score_txt.get_width() // 2, height - 120))
+        surface.blit(lvl_txt, (250 - score_txt.get_width() // 2, height - 30))
+        self.rects.append(self.panel)
+
+    def draw(self, game):
+        """Bring the surface up to date with `game`; returns the changed rects."""
+        self.rects = []
+        surface = self.surface
+        if game is not self.game:
+            self.game = game
+            self.cells = {}
+            self.panel_key = None
+            self.ended = False
+            surface.blit(self.background, (0, 0))
+            self.rects.append(surface.get_rect())
+
+        cells = self._board(game)
+        old = self.cells
+        for pos in old.keys() - cells.keys():
+            r, c = pos
+            surface.blit(self.tile((0, 0)), (c * cell, r * cell))
+            self.rects.append(pygame.Rect(c * cell, r * cell, cell, cell))
+        for pos, key in cells.items():
+            if old.get(pos) != key:
+                r, c = pos
+                surface.blit(self.tile(key), (c * cell, r * cell))
+                self.rects.append(pygame.Rect(c * cell, r * cell, cell, cell))
+        self.cells = cells
+
+        nxt = game.next
+        panel_key = (nxt and (nxt.type, nxt.rotation, nxt.color), game.score, game.lvl)
+        if panel_key != self.panel_key:
+            self.panel_key = panel_key
+            self._draw_panel(game)
+
+        if game.end and (not self.ended or self.rects):
+            game.end_game(surface)
+            self.rects.append(pygame.Rect(50, 140, width - 100, height - 350))
+        self.ended = game.end
+        return self.rects
+
+    def update(self, game):
+        rects = self.draw(game)
+        if rects:
+            pygame.display.update(rects)
+        return rects
+
+
+# Simulation ticks per second at 1x: one tick is one frame of the original
+# 60 FPS loop (gravity, edge-triggered keys).
+TICK_RATE = 60
+# After a stall (a slow decision, a dragged window) at most this much wall
+# time is caught up; the rest is dropped rather than replayed in a burst.
+MAX_LAG_S = 0.25
+# Ticks per batch between event polls when the speed is unlimited.
+UNTHROTTLED_BATCH = 256
+# Wall time between redraws unless a tick interval is given.
+REDRAW_S = 1 / 60
+
+
+def dev_main(speed=1.0, render_every=None, seed=None, ticks=None):
+    """
+    Fixed-timestep game loop. The simulation advances TICK_RATE * `speed`
+    ticks per second of wall time (`speed` 0: as fast as it can) and the
+    window is redrawn once at least `render_every` ticks have passed
+    (default: every REDRAW_S of wall time, whatever the speed; 0: never). Every tick reads the
+    keys and steps the engine exactly as the 60 FPS loop did, so a seeded
+    game plays out the same at 1x and 100x. Stops after `ticks` ticks, or
+    at game over when nothing is drawn.
+    """
     from player.player import update_game_state
-    
+
+    tick_s = 1.0 / (TICK_RATE * speed) if speed > 0 else 0.0
+
     run = True
-    game = tetris(rows, cols)
-    player_grid = Grid()
-    cnt = 0
-    move = True
-    space_press = False
-    
+    sim = TetrisEngine(rows, cols, seed=seed, game_cls=tetris)
+    game = sim.game
+    restarts = 0
+
     update_game_state(game)
-    
-    last_keys = {pygame.K_LEFT: False, pygame.K_RIGHT: False, 
+
+    last_keys = {pygame.K_LEFT: False, pygame.K_RIGHT: False,
                  pygame.K_DOWN: False, pygame.K_UP: False, pygame.K_SPACE: False}
-    
+
+    renderer = Renderer(screen) if render_every != 0 else None
+    replay = hashlib.sha1()
+    tick = drawn = 0
+    t_start = next_t = time.perf_counter()
+    drawn_t = t_start - REDRAW_S
+
     while run:
-        screen.fill(bg_color)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
-                sys.exit()
-        keys = pygame.key.get_pressed()
-        if not game.end:
-            if keys[pygame.K_LEFT] and not last_keys[pygame.K_LEFT]:
-                game.left()
-            elif keys[pygame.K_RIGHT] and not last_keys[pygame.K_RIGHT]:
-                game.right()
-            elif keys[pygame.K_DOWN] and not last_keys[pygame.K_DOWN]:
-                game.fast_drop()
-            elif keys[pygame.K_UP] and not last_keys[pygame.K_UP]:
-                game.rotate()
-            elif keys[pygame.K_SPACE] and not last_keys[pygame.K_SPACE]:
-                space_press = True
-        
-        last_keys[pygame.K_LEFT] = keys[pygame.K_LEFT]
-        last_keys[pygame.K_RIGHT] = keys[pygame.K_RIGHT]
-        last_keys[pygame.K_DOWN] = keys[pygame.K_DOWN]
-        last_keys[pygame.K_UP] = keys[pygame.K_UP]
-        last_keys[pygame.K_SPACE] = keys[pygame.K_SPACE]
-                
-        if keys[pygame.K_r] and game.end:
-            game.__init__(rows, cols)
-
-        if keys[pygame.K_ESCAPE] or keys[pygame.K_q]:
-            run = False
-            sys.exit()
-
-        cnt += 1
-        if cnt >= 1000:
-            cnt = 0
-
-        if move:
-            if (cnt % (15 // game.lvl * 1.5)) == 0:
-                if not game.end:
-                    if space_press:
-                        game.freefall()
-                        space_press = False
-                    else:
-                        game.move()
-        game.make_grid()
-
-        for x in range(rows):
-            for y in range(cols):
-                if game.grid[x][y] > 0:
-                    val = game.grid[x][y]
-                    img = assets[val]
-                    screen.blit(img, (y * cell, x * cell))
-                    pygame.draw.rect(screen, white, (y * cell, x * cell, cell, cell), 1)
-        if game.fig:
-            for i in range(4):
-                for j in range(4):
-                    if (i * 4 + j) in game.fig.img():
-                        x = (game.fig.x + j) * cell
-                        y = (game.fig.y + i) * cell
-                        img = pygame.transform.scale(
-                            assets[game.fig.color], (cell - 2, cell - 2)
-                        )
-                        screen.blit(img, (x + 1, y + 1))
-
-        if game.next:
-            for i in range(4):
-                for j in range(4):
-                    if (i * 4 + j) in game.next.img():
-                        img = assets[game.next.color]
-                        x = (game.next.x + j - 4) * cell
-                        y = (game.next.y + i) * cell + height - 100
-                        screen.blit(img, (x, y))
-                        
-        if game.end:
-            game.end_game()
+        if tick_s:
+            now = time.perf_counter()
+            if now < next_t:
+                time.sleep(next_t - now)
+                continue
+            next_t = max(next_t, now - MAX_LAG_S)
+            due = int((now - next_t) / tick_s) + 1
+            next_t += due * tick_s
+        else:
+            due = UNTHROTTLED_BATCH
+
+        for _ in range(due):
+            if not run or (ticks is not None and tick >= ticks):
+                run = False
+                break
+            keys = pygame.key.get_pressed()
+            action = None
+            if not game.end:
+                if keys[pygame.K_LEFT] and not last_keys[pygame.K_LEFT]:
+                    action = "a"
+                elif keys[pygame.K_RIGHT] and not last_keys[pygame.K_RIGHT]:
+                    action = "d"
+                elif keys[pygame.K_DOWN] and not last_keys[pygame.K_DOWN]:
+                    action = "s"
+                elif keys[pygame.K_UP] and not last_keys[pygame.K_UP]:
+                    action = "w"
+                elif keys[pygame.K_SPACE] and not last_keys[pygame.K_SPACE]:
+                    action = " "
+
+            last_keys[pygame.K_LEFT] = keys[pygame.K_LEFT]
+            last_keys[pygame.K_RIGHT] = keys[pygame.K_RIGHT]
+            last_keys[pygame.K_DOWN] = keys[pygame.K_DOWN]
+            last_keys[pygame.K_UP] = keys[pygame.K_UP]
+            last_keys[pygame.K_SPACE] = keys[pygame.K_SPACE]
+
+            if keys[pygame.K_r] and game.end:
+                restarts += 1
+                sim.reset(None if seed is None else seed + restarts)
+                game = sim.game
+                update_game_state(game)
+
+            if keys[pygame.K_ESCAPE] or keys[pygame.K_q]:
+                run = False
+                break
 
-        score_txt = font.render(f"{game.score}", True, white)
-        lvl_txt = font_2.render(f"Level: {game.lvl}", True, white)
-        screen.blit(score_txt, (250 - score_txt.get_width() // 2, height - 120))
-        screen.blit(lvl_txt, (250 - score_txt.get_width() // 2, height - 30))
+            sim.step(action)
+            replay.update(repr(action).encode())
+            tick += 1
+            if game.end and renderer is None:
+                run = False
+                break
 
-        pygame.display.update()
-        clock.tick(60)
+        if renderer is not None:
+            now = time.perf_counter()
+            if render_every is None:
+                redraw = now - drawn_t >= REDRAW_S
+            else:
+                redraw = tick - drawn >= render_every
+            if redraw or not run:
+                drawn, drawn_t = tick, now
+                renderer.update(game)
+
+    elapsed = time.perf_counter() - t_start
+    print(f"{tick} ticks in {elapsed:.1f} s ({tick / max(elapsed, 1e-9):.0f} ticks/s), "
+          f"{game.score} lines, {game.pieces} pieces, replay {replay.hexdigest()[:16]}",
+          flush=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Tetris with the bot at the controls")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="simulation speed as a multiple of real time; 0 runs unthrottled")
+    ap.add_argument("--render-every", type=int, default=None,
+                    help="redraw every N ticks (default: about 60 redraws/s of wall time at any speed)")
+    ap.add_argument("--no-render", action="store_true",
+                    help="never draw; the run ends at game over")
+    ap.add_argument("--seed", type=int, default=None, help="piece sequence seed, for replays")
+    ap.add_argument("--ticks", type=int, default=None, help="stop after N ticks")
+    args = ap.parse_args(argv)
+    dev_main(speed=args.speed, render_every=0 if args.no_render else args.render_every,
+             seed=args.seed, ticks=args.ticks)
 
 
 if __name__ == "__main__":
-    dev_main()
\ No newline at end of file
+    main()
\ No newline at end of file